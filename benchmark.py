@@ -0,0 +1,402 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from bs4 import BeautifulSoup
+from colorama import Fore, Style
+
+import main
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def synthetic_page(size_kb):
+    """
+    Builds a profile-like HTML page of roughly the requested size.
+
+    Args:
+        size_kb (int): Approximate size of the page in kilobytes.
+
+    Returns:
+        bytes: The page.
+    """
+    head = (
+        '<html><head><title>Profile</title>'
+        '<meta property="og:description" content="1,234 Followers, 56 Following, 78 Posts - Benchmark profile">'
+        '<meta property="og:image" content="https://example.com/avatar.png">'
+        '<meta name="description" content="Benchmark profile">'
+        + '<script>var x = 1;</script>' * 20 +
+        '</head><body>'
+    )
+    block = '<div class="post"><a href="/p/1"><img src="/i/1.jpg" alt="photo"></a><p>Some caption text here</p></div>'
+    count = max(1, (size_kb * 1024 - len(head)) // len(block))
+    return (head + block * count + '</body></html>').encode()
+
+def cpu_time(func, repeat):
+    """
+    Runs a function repeatedly and returns the CPU seconds per run.
+
+    Args:
+        func (callable): The function to time.
+        repeat (int): How many times to run it.
+
+    Returns:
+        float: Average CPU seconds per run.
+    """
+    start = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - start) / repeat
+
+def bench_parse(args):
+    """
+    Compares the CPU cost of parsing one scan's worth of responses before and after
+    rule-driven parsing.
+
+    The baseline parses every response with html.parser, as check_site used to.
+    The current path only parses sites that have selector rules, with the fastest
+    available parser, and only their <head> when that is all the selectors need.
+    """
+    if args.html:
+        with open(args.html, "rb") as f:
+            content = f.read()
+    else:
+        content = synthetic_page(args.page_size)
+    sites = main.load_default_sites()
+
+    def baseline():
+        for site in sites:
+            BeautifulSoup(content, 'html.parser')
+
+    def current():
+        for site in sites:
+            main.parse_profile("benchmark", site, site.url.format("benchmark"), content)
+
+    parsed = sum(1 for site in sites if site.needs_soup)
+    head_only = sum(1 for site in sites if site.needs_soup and site.head_only)
+    print(Fore.BLUE + f"[+] {len(sites)} sites, {len(content) // 1024} KB page, parser: {main.HTML_PARSER}" + Style.RESET_ALL)
+    print(Fore.BLUE + f"[+] {parsed} sites parsed ({head_only} head only), {len(sites) - parsed} skipped" + Style.RESET_ALL)
+
+    before = cpu_time(baseline, args.repeat)
+    after = cpu_time(current, args.repeat)
+    print(Fore.GREEN + f"[+] Full html.parser on every site: {before * 1000:.1f} ms CPU per scan" + Style.RESET_ALL)
+    print(Fore.GREEN + f"[+] Rule-driven parsing:            {after * 1000:.1f} ms CPU per scan" + Style.RESET_ALL)
+    if before:
+        print(Fore.GREEN + f"[+] Saved {(before - after) * 1000:.1f} ms per scan ({(1 - after / before) * 100:.1f}%)" + Style.RESET_ALL)
+
+class MockServer:
+    """
+    A local HTTP/1.1 stand-in for the site catalogue, serving synthetic profiles.
+
+    Every request path is /<site>/<username>. Whether the profile exists is fixed per
+    path; latency, server errors and hangs are drawn per request. Rate limiting comes
+    in bursts: once a site starts answering 429, its next `rate_limit_burst` requests
+    all get 429, as a real host does until its window resets. Bursts start often
+    enough that about `rate_limit_ratio` of all requests are rate limited.
+    """
+    def __init__(self, latency=0.05, not_found_ratio=0.8, error_ratio=0.0, rate_limit_ratio=0.0, hang_ratio=0.0, body_size=64, rate_limit_burst=5, seed=1):
+        self.latency = latency
+        self.not_found_ratio = not_found_ratio
+        self.error_ratio = error_ratio
+        self.rate_limit_burst = max(1, rate_limit_burst)
+        # Chance a request outside a burst starts one, so bursts cover rate_limit_ratio of requests
+        ratio = min(rate_limit_ratio, 0.99)
+        self.burst_start = ratio / (self.rate_limit_burst * (1 - ratio) + ratio)
+        self.bursts = {}
+        self.hang_ratio = hang_ratio
+        self.random = random.Random(seed)
+        self.page = synthetic_page(body_size)
+
+    def plan(self, path):
+        """
+        Decides how to answer one request.
+
+        Returns:
+            tuple: (status, extra headers, body, delay in seconds), or None to hang.
+        """
+        site = path.split("/")[1]
+        delay = self.latency * self.random.uniform(0.5, 1.5)
+        if self.bursts.get(site):
+            self.bursts[site] -= 1
+            return 429, {"Retry-After": "1"}, b"Too Many Requests", delay
+        roll = self.random.random()
+        if roll < self.hang_ratio:
+            return None
+        roll -= self.hang_ratio
+        if roll < self.burst_start:
+            self.bursts[site] = self.rate_limit_burst - 1
+            return 429, {"Retry-After": "1"}, b"Too Many Requests", delay
+        roll -= self.burst_start
+        if roll < self.error_ratio:
+            return 503, {}, b"Service Unavailable", delay
+        if zlib.crc32(path.encode()) % 1000 < self.not_found_ratio * 1000:
+            return 404, {}, b"Not Found", delay
+        return 200, {"Content-Type": "text/html"}, self.page, delay
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path = request_line.decode("latin-1").split(" ")[:2]
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                plan = self.plan(path)
+                if plan is None:
+                    await asyncio.sleep(3600)
+                    break
+                status, headers, body, delay = plan
+                await asyncio.sleep(delay)
+                head = f"HTTP/1.1 {status} Mock\r\nContent-Length: {len(body)}\r\n"
+                head += "".join(f"{key}: {value}\r\n" for key, value in headers.items())
+                writer.write(head.encode() + b"\r\n" + (b"" if method == "HEAD" else body))
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, ready):
+        server = await asyncio.start_server(self.handle, "127.0.0.1", 0, backlog=4096)
+        ready.put(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+def run_mock_server(options, ready):
+    asyncio.run(MockServer(**options).serve(ready))
+
+def local_sites(port):
+    """
+    Rewrites the default catalogue so every site points at the mock server.
+
+    Args:
+        port (int): The mock server's port.
+
+    Returns:
+        dict: A version 2 site list.
+    """
+    definitions = []
+    for index, definition in enumerate(main.read_default_sites()["sites"]):
+        definition = dict(definition, url=f"http://127.0.0.1:{port}/s{index}/{{}}")
+        definitions.append(definition)
+    return {"version": main.SITE_SCHEMA_VERSION, "sites": definitions}
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def children_peak_rss_mb():
+    # Linux reports the largest peak among the children that have been waited for
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+def run_scan(engine, concurrency, port, usernames, timeout, retries, host_rate, workers, results):
+    """
+    Runs one engine/concurrency configuration in a fresh process and reports its numbers.
+    """
+    sites = main.load_sites(local_sites(port))
+    names = [f"bench_user_{i}" for i in range(usernames)]
+    if workers > 1:
+        scanner = main.ShardedEngine(workers, sites, name=engine, threads=concurrency, timeout=timeout, max_retries=retries,
+                                     concurrency=concurrency, limit_per_host=concurrency, host_rate=host_rate, host_burst=host_rate or 1)
+    else:
+        scanner = main.make_engine(engine, concurrency, timeout, retries, concurrency, concurrency, host_rate, host_rate or 1)
+    latencies = []
+    statuses = {}
+    cpu_started = time.process_time()
+    started = time.monotonic()
+    try:
+        for result in scanner.scan(main.iter_jobs(names, sites)):
+            latencies.append(result.elapsed)
+            statuses[result.status] = statuses.get(result.status, 0) + 1
+    finally:
+        scanner.close()
+    wall = time.monotonic() - started
+    results.put({
+        "engine": engine,
+        "concurrency": concurrency,
+        "workers": workers,
+        "probes": len(latencies),
+        "wall": wall,
+        "probes_per_sec": len(latencies) / wall if wall else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "cpu": time.process_time() - cpu_started + children_cpu(),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "worker_peak_rss_mb": children_peak_rss_mb() if workers > 1 else None,
+        "statuses": statuses,
+    })
+
+def bench_scan(args):
+    """
+    Measures scan throughput for each engine and concurrency against a local mock server.
+    """
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    server_options = {
+        "latency": args.latency / 1000,
+        "not_found_ratio": args.not_found_ratio,
+        "error_ratio": args.error_ratio,
+        "rate_limit_ratio": args.rate_limit_ratio,
+        "rate_limit_burst": args.rate_limit_burst,
+        "hang_ratio": args.hang_ratio,
+        "body_size": args.body_size,
+    }
+    server = context.Process(target=run_mock_server, args=(server_options, ready), daemon=True)
+    server.start()
+    port = ready.get(timeout=10)
+    print(Fore.BLUE + f"[+] Mock server on 127.0.0.1:{port}, {len(main.load_default_sites())} sites x {args.usernames} usernames" + Style.RESET_ALL)
+
+    report = []
+    try:
+        for engine in args.engines.split(","):
+            for concurrency in (int(value) for value in args.concurrency.split(",")):
+                results = context.Queue()
+                worker = context.Process(target=run_scan, args=(engine, concurrency, port, args.usernames, args.timeout, args.retry, args.host_rate, args.workers, results))
+                worker.start()
+                row = results.get()
+                worker.join()
+                report.append(row)
+                rss = f"rss {row['peak_rss_mb']:6.1f} MB"
+                if row["worker_peak_rss_mb"]:
+                    rss += f" + {args.workers} x {row['worker_peak_rss_mb']:.1f} MB"
+                print(Fore.GREEN + f"[+] {engine:>6} x{concurrency:<5}{f' w{args.workers}' if args.workers > 1 else ''} {row['probes_per_sec']:8.1f} probes/s  "
+                      f"p50 {row['p50'] * 1000:7.1f} ms  p95 {row['p95'] * 1000:7.1f} ms  p99 {row['p99'] * 1000:7.1f} ms  "
+                      f"cpu {row['cpu']:6.2f} s  {rss}" + Style.RESET_ALL)
+    finally:
+        server.terminate()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"server": server_options, "usernames": args.usernames, "runs": report}, f, indent=4)
+        print(Fore.GREEN + f"[+] Report saved to {args.json}" + Style.RESET_ALL)
+
+def time_command(command, repeat):
+    """
+    Runs a command repeatedly and returns its wall-clock times in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - started)
+    return times
+
+def slowest_imports(count):
+    """
+    Lists the modules that importing main pulls in directly, slowest first.
+
+    Returns:
+        list: (module, cumulative milliseconds) pairs.
+    """
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=HERE, capture_output=True, text=True, check=True).stderr
+    imports = []
+    children = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or not line.split("|")[1].strip().isdigit():
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        # Modules are listed after everything they import, so main follows its direct imports
+        if depth == 1:
+            children.append((name.strip(), int(cumulative) / 1000))
+        elif depth == 0:
+            if name.strip() == "main":
+                imports = children
+            children = []
+    return sorted(imports, key=lambda item: -item[1])[:count]
+
+def bench_startup(args):
+    """
+    Measures the fixed cost of one CLI invocation: interpreter start, imports, site
+    loading and the first probe against a local mock server.
+    """
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    server = context.Process(target=run_mock_server, args=({"latency": 0, "not_found_ratio": 0.0, "body_size": 1}, ready), daemon=True)
+    server.start()
+    port = ready.get(timeout=10)
+    script = os.path.join(HERE, "main.py")
+    report = {}
+    try:
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump({"version": main.SITE_SCHEMA_VERSION, "sites": [{"name": "Local", "url": f"http://127.0.0.1:{port}/local/{{}}"}]}, f)
+        commands = {
+            "import": [sys.executable, "-c", "import main"],
+            "help": [sys.executable, script, "--help"],
+            "catalogue": [sys.executable, "-c", "import main; main.load_default_sites()"],
+            "scan": [sys.executable, script, "bench_user", "-f", f.name, "--host-rate", "0"],
+            "scan --quiet": [sys.executable, script, "bench_user", "-f", f.name, "--host-rate", "0", "--quiet"],
+        }
+        print(Fore.BLUE + f"[+] {args.repeat} runs each, {sys.executable}" + Style.RESET_ALL)
+        for label, command in commands.items():
+            times = time_command(command, args.repeat)
+            report[label] = {"min": min(times), "median": percentile(times, 0.5)}
+            print(Fore.GREEN + f"[+] {label:<13} median {report[label]['median'] * 1000:7.1f} ms  min {report[label]['min'] * 1000:7.1f} ms" + Style.RESET_ALL)
+    finally:
+        server.terminate()
+        os.unlink(f.name)
+
+    if args.imports:
+        print(Fore.YELLOW + "[+] Slowest imports of main:" + Style.RESET_ALL)
+        for name, elapsed in slowest_imports(args.imports):
+            print(Fore.YELLOW + f"    [+] {name:<24} {elapsed:6.1f} ms" + Style.RESET_ALL)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": sys.version, "repeat": args.repeat, "runs": report}, f, indent=4)
+        print(Fore.GREEN + f"[+] Report saved to {args.json}" + Style.RESET_ALL)
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="UserScope benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parse_parser = subparsers.add_parser("parse", help="CPU cost of response parsing per scan")
+    parse_parser.add_argument("--page-size", type=int, default=256, help="Synthetic page size in KB (default: 256)")
+    parse_parser.add_argument("--html", help="Use a saved HTML page instead of a synthetic one")
+    parse_parser.add_argument("--repeat", type=int, default=1, help="Scans to average over (default: 1)")
+    parse_parser.set_defaults(func=bench_parse)
+
+    scan_parser = subparsers.add_parser("scan", help="Scan throughput against a local mock server")
+    scan_parser.add_argument("--engines", default="thread,async", help="Comma-separated engines to run (default: thread,async)")
+    scan_parser.add_argument("--concurrency", default="10,50", help="Comma-separated thread/connection counts to run (default: 10,50)")
+    scan_parser.add_argument("--usernames", type=int, default=5, help="Usernames per run, each checked against every site (default: 5)")
+    scan_parser.add_argument("--latency", type=float, default=50, help="Mean server latency in ms (default: 50)")
+    scan_parser.add_argument("--body-size", type=int, default=64, help="Profile page size in KB (default: 64)")
+    scan_parser.add_argument("--not-found-ratio", type=float, default=0.8, help="Share of profiles that answer 404 (default: 0.8)")
+    scan_parser.add_argument("--error-ratio", type=float, default=0.0, help="Share of requests answered with 503 (default: 0)")
+    scan_parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Share of requests answered with 429 (default: 0)")
+    scan_parser.add_argument("--rate-limit-burst", type=int, default=5, help="Consecutive 429s a site answers once it starts rate limiting (default: 5)")
+    scan_parser.add_argument("--hang-ratio", type=float, default=0.0, help="Share of requests that never get an answer (default: 0)")
+    scan_parser.add_argument("--timeout", type=float, default=5, help="Client timeout in seconds (default: 5)")
+    scan_parser.add_argument("-r", "--retry", type=int, default=3, help="Maximum attempts per probe (default: 3)")
+    scan_parser.add_argument("--host-rate", type=float, default=0, help="Per-host rate limit; every mock site shares one host (default: 0, disabled)")
+    scan_parser.add_argument("-w", "--workers", type=int, default=1, help="Worker processes per run, with the concurrency applying to each (default: 1)")
+    scan_parser.add_argument("--json", help="Save the report as JSON for comparison across runs")
+    scan_parser.set_defaults(func=bench_scan)
+
+    startup_parser = subparsers.add_parser("startup", help="Cold-start time of the CLI")
+    startup_parser.add_argument("--repeat", type=int, default=10, help="Runs per command (default: 10)")
+    startup_parser.add_argument("--imports", type=int, default=5, help="Slowest imports to list, 0 for none (default: 5)")
+    startup_parser.add_argument("--json", help="Save the report as JSON for comparison across runs")
+    startup_parser.set_defaults(func=bench_startup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main_cli()
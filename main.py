@@ -1,13 +1,38 @@
-import requests
-import pyfiglet
 from colorama import Fore, Style
 import argparse
+import collections
 import concurrent.futures
+import functools
+import importlib.util
+import itertools
+import queue
+import threading
 import os
+import sys
 import json
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import re
+import zlib
+import socket
+import time
+import random
+
+# requests, urllib3, aiohttp, asyncio, bs4, soupsieve, pyfiglet and multiprocessing are
+# imported where first needed, so short runs and --help don't pay for what they never use.
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+def has_aiohttp():
+    """
+    Tells whether the async engine can run, without importing aiohttp.
+    """
+    return importlib.util.find_spec("aiohttp") is not None
+
+# The default site catalogue, a version 2 site list as described by load_sites()
+DEFAULT_SITES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sites.json")
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+}
 
 class UserProfile:
     """
@@ -61,376 +86,2967 @@ def extract_domain(url):
     except:
         return None
 
-def check_site(username, site, timeout=10, max_retries=3):
+SECOND_LEVEL_SUFFIXES = {"co", "com", "net", "org", "ac", "gov", "edu", "ne", "or"}
+
+def host_key(url):
     """
-    Checks if a username exists on a given site and retrieves profile information.
+    Returns the key used to rate limit requests to a URL's host.
+
+    Subdomains are folded into their parent domain so that templates such as
+    "{}.tumblr.com" share one bucket across usernames.
 
     Args:
-        username (str): The username to search for.
-        site (dict): A dictionary containing the site's name, URL, and existence status.
-        timeout (int): Timeout for the request in seconds.
-        max_retries (int): Maximum number of retries for failed requests.
+        url (str): The URL being requested.
 
     Returns:
-        UserProfile: A UserProfile object if the username was found, None otherwise.
+        str: The registrable part of the URL's domain.
     """
-    url = site["url"].format(username)
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-    }
+    domain = (extract_domain(url) or "").rsplit("@", 1)[-1].lower()
+    if not domain.startswith("["):
+        domain = domain.split(":", 1)[0]
+    labels = domain.split(".")
+    if labels[-1].isdigit() or ":" in domain:
+        return domain
+    if len(labels) > 2 and labels[-2] in SECOND_LEVEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
 
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, timeout=timeout, headers=headers)
-            response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header into a number of seconds.
 
-            soup = BeautifulSoup(response.content, 'html.parser')
-            followers, following, bio, pfp_url = None, None, None, None
-            additional_info = {}
+    Args:
+        value (str): The header value, either delta-seconds or an HTTP date.
 
-            if site["name"] == "Instagram":
-                try:
-                    data = soup.find("meta",  property="og:description")
-                    content = data["content"].split('-')
-                    followers = content[0].replace(" Followers, ", "")
-                    following = content[1].replace(" Following, ", "")
-                    bio = content[2]
-                    img = soup.find("meta",  property="og:image")
-                    pfp_url = img["content"] if img else None
-                except:
-                    pass
-            elif site["name"] == "Twitter":
-                try:
-                    followers_element = soup.find("a", {"href": f"https://twitter.com/{username}/followers"})
-                    followers = followers_element.find("span", {"class": "css-901oao css-16my406 r-poiln3 r-bcqeeo r-qvutc0"}).text
-                    following_element = soup.find("a", {"href": f"https://twitter.com/{username}/following"})
-                    following = following_element.find("span", {"class": "css-901oao css-16my406 r-poiln3 r-bcqeeo r-qvutc0"}).text
-                    bio_element = soup.find("div", {"class": "css-901oao r-1nao33i r-37j5jr r-a023e6 r-16dba41 r-rjxpzi r-bcqeeo r-bnwqim r-qvutc0"})
-                    bio = bio_element.text if bio_element else None
-                    img = soup.find("img", {"alt": "Profile picture"})
-                    pfp_url = img["src"] if img else None
-                except:
-                    pass
-            elif site["name"] == "YouTube":
-                try:
-                    # Extracting followers (subscribers)
-                    subscribers_element = soup.find('yt-formatted-string', {'id': 'subscriber-count'})
-                    followers = subscribers_element.text.strip() if subscribers_element else None
-                    
-                    # Extracting bio (description)
-                    description_element = soup.find('meta', {'name': 'description'})
-                    bio = description_element['content'] if description_element else None
-
-                    # Extracting profile picture URL
-                    img_element = soup.find('img', {'id': 'img', 'class': 'style-scope yt-img-shadow'})
-                    pfp_url = img_element['src'] if img_element else None
-                except:
-                    pass
-            elif site["name"] == "Facebook":
-                try:
-                    # Extracting followers (likes)
-                    likes_element = soup.find('div', {'class': '_64-k'})
-                    followers = likes_element.text.replace(' people like this', '') if likes_element else None
-
-                    # Extracting bio (description)
-                    description_element = soup.find('meta', {'name': 'description'})
-                    bio = description_element['content'] if description_element else None
-
-                    # Extracting profile picture URL
-                    img_element = soup.find('img', {'class': 'profilePic img'})
-                    pfp_url = img_element['src'] if img_element else None
-                except:
-                    pass
-            elif site["name"] == "TikTok":
-                try:
-                    # Extracting followers, following, and likes
-                    followers_element = soup.find('strong', {'data-e2e': 'followers-count'})
-                    followers = followers_element.text if followers_element else None
-                    following_element = soup.find('strong', {'data-e2e': 'following-count'})
-                    following = following_element.text if following_element else None
-
-                    # Extracting bio
-                    bio_element = soup.find('h2', {'data-e2e': 'user-bio'})
-                    bio = bio_element.text if bio_element else None
-
-                    # Extracting profile picture URL
-                    img_element = soup.find('img', {'class': 'tiktok-avatar'})
-                    pfp_url = img_element['src'] if img_element else None
-                except:
-                    pass
-            elif site["name"] == "Twitch":
-                try:
-                    # Extracting followers
-                    followers_element = soup.find('p', {'data-a-target': 'followers-count'})
-                    followers = followers_element.text if followers_element else None
-
-                    # Extracting bio
-                    bio_element = soup.find('p', {'class': 'core-section-header-description'})
-                    bio = bio_element.text if bio_element else None
-
-                    # Extracting profile picture URL
-                    img_element = soup.find('img', {'class': 'channel-header__user-avatar'})
-                    pfp_url = img_element['src'] if img_element else None
-                except:
-                    pass
-            elif site["name"] == "Pinterest":
-                try:
-                    # Extracting followers
-                    followers_element = soup.find('div', {'class': 'tBJ dyH iFc sIg zI7 iyn Hsu'})
-                    followers = followers_element.text.replace(' followers', '') if followers_element else None
-
-                    # Extracting bio
-                    bio_element = soup.find('div', {'class': 'Eqh'})
-                    bio = bio_element.text if bio_element else None
-
-                    # Extracting profile picture URL
-                    img_element = soup.find('img', {'class': 'hCL kVc L4E MIw'});
-                    pfp_url = img_element['src'] if img_element else None
-                except:
-                    pass
-            # Add more site-specific logic here to extract followers, following, and bio
-
-            return UserProfile(username, site["name"], url, followers, following, bio, pfp_url, additional_info)
-        except requests.exceptions.RequestException:
-            if attempt < max_retries - 1:
-                pass
+    Returns:
+        float: Seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        import email.utils
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class HostScheduler:
+    """
+    Spaces out requests per host with token buckets and adapts overall concurrency.
+
+    Each host key gets a bucket refilled at `rate` requests per second holding up to
+    `burst` tokens. A 429 or 503 blocks the host for its Retry-After (or an exponential
+    backoff) and halves the concurrency limit; healthy responses grow the limit back
+    additively, up to `max_concurrency`.
+    """
+    def __init__(self, rate=2.0, burst=2, max_concurrency=20, min_concurrency=1, max_backoff=60.0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = max(1, min(min_concurrency, max_concurrency))
+        self.max_backoff = max_backoff
+        self.limit = float(max_concurrency)
+        self.lock = threading.Lock()
+        self.arrival = {}
+        self.blocked_until = {}
+        self.backoff = {}
+        self.last_decrease = 0.0
+
+    @property
+    def concurrency(self):
+        """
+        The number of probes currently allowed in flight.
+        """
+        return int(self.limit)
+
+    def reserve(self, host):
+        """
+        Takes a token for the host and returns how long to wait before using it.
+
+        Args:
+            host (str): The host key, see host_key().
+
+        Returns:
+            float: Seconds to sleep before sending the request.
+        """
+        now = time.monotonic()
+        with self.lock:
+            start = max(now, self.blocked_until.get(host, 0.0))
+            if not self.rate:
+                return start - now
+            interval = 1.0 / self.rate
+            arrival = max(self.arrival.get(host, start), start) + interval
+            self.arrival[host] = arrival
+            return max(start - now, arrival - self.burst * interval - now)
+
+    def observe(self, host, status, retry_after=None):
+        """
+        Feeds a response back into the scheduler.
+
+        Args:
+            host (str): The host key, see host_key().
+            status (int): The HTTP status code received.
+            retry_after (str): The response's Retry-After header, if any.
+        """
+        now = time.monotonic()
+        with self.lock:
+            if status in (429, 503):
+                backoff = min(self.max_backoff, self.backoff.get(host, 0.5) * 2)
+                self.backoff[host] = backoff
+                delay = parse_retry_after(retry_after)
+                delay = backoff if delay is None else min(delay, self.max_backoff)
+                self.blocked_until[host] = max(self.blocked_until.get(host, 0.0), now + delay)
+                # Halve at most once per second so one burst of 429s is a single signal
+                if now - self.last_decrease >= 1.0:
+                    self.limit = max(self.min_concurrency, self.limit / 2)
+                    self.last_decrease = now
             else:
+                self.backoff.pop(host, None)
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+
+SITE_SCHEMA_VERSION = 2
+DETECTION_METHODS = ("status_code", "redirect", "marker", "absent_marker")
+PROFILE_FIELDS = ("followers", "following", "bio", "pfp_url")
+HEAD_SELECTOR = re.compile(r"^\s*(meta|title|link|base)(\[[^\]]*\])*\s*$")
+HEAD_END = re.compile(rb"</head\s*>", re.IGNORECASE)
+DEFAULT_MAX_BODY = 1024 * 1024
+CHUNK_SIZE = 16 * 1024
+# Bytes before a new chunk searched again, so a match split across chunks is found
+SCAN_OVERLAP = 1024
+DRAIN_LIMIT = 64 * 1024
+NOT_FOUND_STATUSES = (404, 410)
+BLOCKED_STATUSES = (401, 403, 451)
+
+class FieldRule:
+    """
+    A compiled rule extracting one profile field from a response.
+
+    The value is taken from the first element matching `selector` (its `attr`, or its
+    text when no attribute is given), or from the raw body when there is no selector.
+    An optional `regex` then narrows it down to its first group, or the whole match.
+    """
+    def __init__(self, field, selector=None, attr=None, regex=None):
+        self.field = field
+        self.in_head = bool(selector and HEAD_SELECTOR.match(selector))
+        self.selector_text = selector
+        self._selector = None
+        self.attr = attr
+        self.regex = re.compile(regex if selector else regex.encode()) if regex else None
+        if not self.selector_text and not self.regex:
+            raise ValueError(f"extract rule for '{field}' needs a selector or a regex")
+
+    @property
+    def selector(self):
+        """
+        The compiled CSS selector, compiled on first use, or None for body-only rules.
+        """
+        if self._selector is None and self.selector_text:
+            import soupsieve
+            self._selector = soupsieve.compile(self.selector_text)
+        return self._selector
+
+    def extract(self, soup, content):
+        """
+        Applies the rule to a parsed page.
+
+        Args:
+            soup (BeautifulSoup): The parsed page, or None for body-only rules.
+            content (bytes): The raw response body.
+
+        Returns:
+            str: The extracted value, or None if the rule did not match.
+        """
+        if not self.selector_text:
+            match = self.regex.search(content)
+            if not match:
                 return None
-        except Exception:
+            value = match.group(1) if self.regex.groups else match.group(0)
+            return value.decode("utf-8", "replace").strip() or None
+
+        element = self.selector.select_one(soup)
+        if element is None:
+            return None
+        value = element.get(self.attr) if self.attr else element.get_text()
+        if isinstance(value, list):
+            value = " ".join(value)
+        if value is None:
             return None
+        if self.regex:
+            match = self.regex.search(value)
+            if not match:
+                return None
+            value = match.group(1) if self.regex.groups else match.group(0)
+        return value.strip() or None
+
+class SiteRule:
+    """
+    A compiled site definition: how to build the profile URL, how to tell whether the
+    profile exists, and which profile fields to extract.
+
+    Detection methods:
+        status_code: the profile exists if the site answers with a non-error status.
+        redirect: the profile is missing if the final URL matches `pattern`.
+        marker: the profile exists only if the body matches `pattern`.
+        absent_marker: the profile is missing if the body matches `pattern`.
+
+    Sites may also set `max_bytes` to cap how much of the body is read, `request`
+    to "head" when the verdict needs no body at all, and `range` to ask the server
+    for only the first `max_bytes` bytes. Usernames are assumed to be matched
+    case-sensitively unless the site sets `case_insensitive`.
+    """
+    def __init__(self, definition):
+        self.definition = definition
+        self.name = definition["name"]
+        self.url = definition["url"]
+        self.enabled = definition.get("enabled", True)
+
+        detect = definition.get("detect") or {"method": "status_code"}
+        if not isinstance(detect, dict):
+            raise ValueError("detect must be an object with a method and a pattern")
+        self.method = detect.get("method", "status_code")
+        if self.method not in DETECTION_METHODS:
+            raise ValueError(f"unknown detection method '{self.method}'")
+        pattern = detect.get("pattern")
+        if self.method != "status_code" and not pattern:
+            raise ValueError(f"detection method '{self.method}' needs a pattern")
+        if self.method == "redirect":
+            self.pattern = re.compile(pattern)
+        elif pattern:
+            self.pattern = re.compile(pattern.encode())
+        else:
+            self.pattern = None
+
+        extract = definition.get("extract") or {}
+        if not isinstance(extract, dict) or not all(isinstance(rule, dict) for rule in extract.values()):
+            raise ValueError("extract must map field names to rule objects")
+        self.extractors = [FieldRule(field, **rule) for field, rule in extract.items()]
+        self.needs_soup = any(rule.selector_text for rule in self.extractors)
+        # Sites whose selectors only read <meta>/<title>/<link> only need the <head> parsed
+        self.head_only = all(rule.in_head for rule in self.extractors if rule.selector_text)
+        self.needs_body = bool(self.extractors) or self.method in ("marker", "absent_marker")
+        self.body_regex = any(not rule.selector_text for rule in self.extractors)
+
+        self.max_bytes = definition.get("max_bytes")
+        if self.max_bytes is not None and (not isinstance(self.max_bytes, int) or self.max_bytes <= 0):
+            raise ValueError("max_bytes must be a positive integer")
+        self.request = definition.get("request", "get").upper()
+        if self.request not in ("GET", "HEAD"):
+            raise ValueError(f"unknown request method '{self.request}'")
+        if self.request == "HEAD" and self.needs_body:
+            raise ValueError("HEAD requests cannot be used with body markers or extract rules")
+        self.range = bool(definition.get("range", False))
+        self.case_insensitive = bool(definition.get("case_insensitive", False))
+        # Entries that differ only in name make the same request and reach the same verdict
+        self.signature = json.dumps({key: value for key, value in definition.items() if key not in ("name", "enabled", "exists")}, sort_keys=True)
+
+    def fetch_key(self, username, fold_case=False):
+        """
+        Identifies the request probing a username makes, so probes that would fetch
+        the same URL with the same rules can share one result.
+
+        Args:
+            username (str): The username.
+            fold_case (bool): Let spellings that differ only in case share a key on
+                sites marked `case_insensitive`.
+
+        Returns:
+            tuple: A hashable key.
+        """
+        if fold_case and self.case_insensitive:
+            username = username.lower()
+        return self.signature, self.url.format(username)
+
+    def exists(self, final_url, content):
+        """
+        Decides whether a successful response is an existing profile.
+
+        Args:
+            final_url (str): The URL the request ended on after redirects.
+            content (bytes): The raw response body.
+
+        Returns:
+            bool: True if the profile exists.
+        """
+        if self.method == "redirect":
+            return not self.pattern.search(final_url)
+        if self.method == "marker":
+            return bool(self.pattern.search(content))
+        if self.method == "absent_marker":
+            return not self.pattern.search(content)
+        return True
+
+    def request_headers(self, max_bytes):
+        """
+        Returns the headers to send for this site.
+
+        Args:
+            max_bytes (int): The body cap in effect.
+
+        Returns:
+            dict: The request headers.
+        """
+        if self.range and self.needs_body:
+            return dict(DEFAULT_HEADERS, Range=f"bytes=0-{max_bytes - 1}")
+        return DEFAULT_HEADERS
+
+class BodyScan:
+    """
+    Watches a streamed body for the point where enough of it has been read to reach
+    a site's verdict and run its extract rules, so the rest can be skipped.
 
-    return None
+    Each call only searches the bytes added since the last one, plus an overlap so
+    a match split across chunks is still found, and what has been found is kept.
+    """
+    def __init__(self, site):
+        self.site = site
+        self.marker_found = site.method not in ("marker", "absent_marker")
+        self.head_found = False
+        self.marker_from = 0
+        self.head_from = 0
+        self.overlap = max(SCAN_OVERLAP, len(site.pattern.pattern)) if site.pattern else SCAN_OVERLAP
+
+    def satisfied(self, content):
+        """
+        Tells whether reading can stop.
+
+        Args:
+            content (bytes): The body read so far.
 
-def sherlock(username, sites, threads=10, timeout=10, output=None, max_retries=3):
+        Returns:
+            bool: True if reading can stop.
+        """
+        site = self.site
+        if not self.marker_found:
+            self.marker_found = site.pattern.search(content, self.marker_from) is not None
+            if not self.marker_found:
+                self.marker_from = max(0, len(content) - self.overlap)
+                return False
+            if site.method == "absent_marker":
+                return True
+        if not site.extractors:
+            return True
+        if site.body_regex or not site.head_only:
+            return False
+        if not self.head_found:
+            self.head_found = HEAD_END.search(content, self.head_from) is not None
+            self.head_from = max(0, len(content) - SCAN_OVERLAP)
+        return self.head_found
+
+def compile_site(definition):
     """
-    Searches for a username on multiple social media platforms and prints the found links,
-    followers, following, and bio.
+    Compiles one site definition into a SiteRule.
 
     Args:
-        username (str): The username to search for.
-        sites (list): A list of dictionaries containing site information.
-        threads (int): The number of threads to use for concurrent requests.
-        timeout (int): Timeout for each request in seconds.
-        output (str): The file path to save the results to (JSON format).
-        max_retries (int): Maximum number of retries for failed requests.
+        definition (dict or SiteRule): The site definition, passed through if already compiled.
+
+    Returns:
+        SiteRule: The compiled site.
+
+    Raises:
+        ValueError: If the definition is malformed.
     """
-    ascii_banner = pyfiglet.figlet_format("UserScope")
-    print(Fore.RED + ascii_banner + Style.RESET_ALL)
+    if isinstance(definition, SiteRule):
+        return definition
+    if not isinstance(definition, dict) or not definition.get("name") or not definition.get("url"):
+        raise ValueError(f"site definition needs a name and a url: {definition!r}")
+    try:
+        return SiteRule(definition)
+    except (AttributeError, TypeError, ValueError, re.error) as e:
+        # A pattern or selector of the wrong JSON type fails with AttributeError
+        raise ValueError(f"site '{definition['name']}': {e}") from e
+
+def check_selectors(sites):
+    """
+    Compiles every CSS selector up front so a bad one is reported when the list is loaded.
 
-    print(Fore.BLUE + "[+] Starting Sherlock Username Search" + Style.RESET_ALL)
-    print(Fore.YELLOW + "[+] Please wait while we check for the username on different social media platforms!" + Style.RESET_ALL)
-
-    results = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
-        futures = [executor.submit(check_site, username, site, timeout, max_retries) for site in sites]
-        for future in concurrent.futures.as_completed(futures):
-            profile = future.result()
-            if profile:
-                results.append(profile.to_dict())
-                print(Fore.GREEN + f"[+] Username found on {profile.site_name}: {profile.url}" + Style.RESET_ALL)
-                if profile.followers:
-                    print(Fore.GREEN + f"    [+] Followers: {profile.followers}" + Style.RESET_ALL)
-                if profile.following:
-                    print(Fore.GREEN + f"    [+] Following: {profile.following}" + Style.RESET_ALL)
-                if profile.followers and profile.following:
-                    print(" " + Style.RESET_ALL)
-                if profile.bio:
-                    print(Fore.GREEN + f"    [+] Bio: {profile.bio}" + Style.RESET_ALL)
-                if profile.pfp_url:
-                    print(Fore.GREEN + f"    [+] Profile Picture URL: {profile.pfp_url}" + Style.RESET_ALL)
-                if profile.additional_info:
-                    for key, value in profile.additional_info.items():
-                         print(Fore.GREEN + f"    [+] {key}: {value}" + Style.RESET_ALL)
+    Args:
+        sites (list): The compiled SiteRule objects.
 
-    if output:
+    Raises:
+        ValueError: If a selector does not compile.
+    """
+    rules = [(site, rule) for site in sites for rule in site.extractors if rule.selector_text]
+    if not rules:
+        return
+    import soupsieve
+    for site, rule in rules:
         try:
-            with open(output, "w") as f:
-                json.dump(results, f, indent=4)
-            print(Fore.GREEN + f"[+] Results saved to {output} in JSON format" + Style.RESET_ALL)
-        except Exception as e:
-            print(Fore.RED + f"[-] Error saving to file: {e}" + Style.RESET_ALL)
+            rule.selector
+        except soupsieve.SelectorSyntaxError as e:
+            raise ValueError(f"site '{site.name}': {e}") from e
 
-    print(Fore.BLUE + "[+] Completed, Thank you for using our tool!" + Style.RESET_ALL)
+def load_sites(data):
+    """
+    Compiles a site list, skipping sites that are disabled.
 
-def main():
-    parser = argparse.ArgumentParser(description="Sherlock: Hunt down social media accounts by username")
-    parser.add_argument("username", help="The username to search for")
-    parser.add_argument("-t", "--threads", type=int, default=10, help="Number of threads to use (default: 10)")
-    parser.add_argument("--timeout", type=int, default=10, help="Timeout for requests in seconds (default: 10)")
-    parser.add_argument("-o", "--output", help="Output file to save results (JSON format)")
-    parser.add_argument("-r", "--retry", type=int, default=3, help="Maximum number of retries for failed requests (default: 3)")
-    parser.add_argument("-f", "--file", type=str, help="File containing a list of sites to check (JSON format)")
-    args = parser.parse_args()
+    Version 1 lists are a bare JSON array of {"name", "url", "exists"} entries, where
+    "exists": false marks a URL that cannot confirm a profile and is skipped. Version 2
+    documents are {"version": 2, "sites": [...]} with per-site detect and extract rules.
 
-    if args.file:
-        try:
-            with open(args.file, "r") as f:
-                sites = json.load(f)
-        except FileNotFoundError:
-            print(Fore.RED + f"[-] Error: Site list file '{args.file}' not found." + Style.RESET_ALL)
-            return
-        except json.JSONDecodeError:
-            print(Fore.RED + f"[-] Error: Invalid JSON format in site list file '{args.file}'." + Style.RESET_ALL)
-            return
+    Args:
+        data (list or dict): The parsed site list.
+
+    Returns:
+        list: The enabled SiteRule objects.
+
+    Raises:
+        ValueError: If the document or any site definition is malformed.
+    """
+    if isinstance(data, list):
+        definitions = [dict(site, enabled=site.get("enabled", site.get("exists", True))) for site in data if isinstance(site, dict)]
+    elif isinstance(data, dict):
+        version = data.get("version")
+        if not isinstance(version, int) or version > SITE_SCHEMA_VERSION:
+            raise ValueError(f"unsupported site list version {version!r} (expected at most {SITE_SCHEMA_VERSION})")
+        definitions = data.get("sites")
+        if not isinstance(definitions, list):
+            raise ValueError("site list needs a 'sites' array")
     else:
-        # Default list of sites (as defined previously)
-        sites = [
-            {"name": "Facebook", "url": "https://www.facebook.com/{}", "exists": True},
-            {"name": "Twitter", "url": "https://twitter.com/{}", "exists": True},
-            {"name": "Instagram", "url": "https://www.instagram.com/{}", "exists": True},
-            {"name": "YouTube", "url": "https://www.youtube.com/{}", "exists": True},
-            {"name": "TikTok", "url": "https://www.tiktok.com/@{}", "exists": True},
-            {"name": "Pinterest", "url": "https://www.pinterest.com/{}", "exists": True},
-            {"name": "LinkedIn", "url": "https://www.linkedin.com/in/{}", "exists": True},
-            {"name": "Reddit", "url": "https://www.reddit.com/user/{}", "exists": True},
-            {"name": "Tumblr", "url": "https://{}.tumblr.com", "exists": True},
-            {"name": "Flickr", "url": "https://www.flickr.com/people/{}", "exists": True},
-            {"name": "Vimeo", "url": "https://vimeo.com/{}", "exists": True},
-            {"name": "Twitch", "url": "https://www.twitch.tv/{}", "exists": True},
-            {"name": "Dribbble", "url": "https://dribbble.com/{}", "exists": True},
-            {"name": "Behance", "url": "https://www.behance.net/{}", "exists": True},
-            {"name": "Medium", "url": "https://medium.com/@{}", "exists": True},
-            {"name": "Quora", "url": "https://www.quora.com/profile/{}", "exists": True},
-            {"name": "Snapchat", "url": "https://www.snapchat.com/add/{}", "exists": True},
-            {"name": "SoundCloud", "url": "https://soundcloud.com/{}", "exists": True},
-            {"name": "GitLab", "url": "https://gitlab.com/{}", "exists": True},
-            {"name": "Bitbucket", "url": "https://bitbucket.org/{}/", "exists": True},
-            {"name": "DeviantArt", "url": "https://www.deviantart.com/{}", "exists": True},
-            {"name": "LiveJournal", "url": "https://{}.livejournal.com/", "exists": True},
-            {"name": "VK", "url": "https://vk.com/{}", "exists": True},
-            {"name": "About.me", "url": "https://about.me/{}", "exists": True},
-            {"name": "AngelList", "url": "https://angel.co/{}", "exists": True},
-            {"name": "Ameba", "url": "https://profile.ameba.jp/ameba/{}", "exists": True},
-            {"name": "Badoo", "url": "https://badoo.com/en/profile/{}", "exists": True},
-            {"name": "Bandcamp", "url": "https://bandcamp.com/{}", "exists": True},
-            {"name": "Basecamp", "url": "https://basecamp.com/{}", "exists": True},
-            {"name": "Blogger", "url": "https://{}.blogspot.com/", "exists": True},
-            {"name": "BuzzFeed", "url": "https://www.buzzfeed.com/{}", "exists": True},
-            {"name": "Couchsurfing", "url": "https://www.couchsurfing.com/people/{}", "exists": True},
-            {"name": "CreativeMarket", "url": "https://creativemarket.com/{}", "exists": True},
-            {"name": "Crunchbase", "url": "https://www.crunchbase.com/person/{}", "exists": True},
-            {"name": "Disqus", "url": "https://disqus.com/by/{}", "exists": True},
-            {"name": "eBay", "url": "https://www.ebay.com/usr/{}", "exists": True},
-            {"name": "Etsy", "url": "https://www.etsy.com/shop/{}", "exists": True},
-            {"name": "Foursquare", "url": "https://foursquare.com/user/{}", "exists": True},
-            {"name": "Gravatar", "url": "https://en.gravatar.com/{}", "exists": True},
-            {"name": "Gumroad", "url": "https://gumroad.com/{}", "exists": True},
-            {"name": "HackerNews", "url": "https://news.ycombinator.com/user?id={}", "exists": True},
-            {"name": "Instructables", "url": "https://www.instructables.com/member/{}", "exists": True},
-            {"name": "Keybase", "url": "https://keybase.io/{}", "exists": True},
-            {"name": "Kickstarter", "url": "https://www.kickstarter.com/profile/{}", "exists": True},
-            {"name": "Last.fm", "url": "https://www.last.fm/user/{}", "exists": True},
-            {"name": "Meetup", "url": "https://www.meetup.com/members/{}", "exists": True},
-            {"name": "MySpace", "url": "https://myspace.com/{}", "exists": True},
-            {"name": "Patreon", "url": "https://www.patreon.com/{}", "exists": True},
-            {"name": "ProductHunt", "url": "https://www.producthunt.com/@{}", "exists": True},
-            {"name": "500px", "url": "https://500px.com/p/{}?view=photos", "exists": True},
-            {"name": "Academia.edu", "url": "https://independent.academia.edu/{}", "exists": True},
-            {"name": "AllTrails", "url": "https://www.alltrails.com/members/{}", "exists": True},
-            {"name": "Anilist", "url": "https://anilist.co/user/{}", "exists": True},
-            {"name": "Archive.org", "url": "https://archive.org/details/{}", "exists": True},
-            {"name": "AskFM", "url": "https://ask.fm/{}", "exists": True},
-            {"name": "BLIP.fm", "url": "https://blip.fm/{}", "exists": True},
-            {"name": "Bitwarden", "url": "https://bitwarden.com/help/article/username-availability/#{}", "exists": False},
-            {"name": "Bookcrossing", "url": "https://www.bookcrossing.com/mybookshelf/{}", "exists": True},
-            {"name": "Buy Me a Coffee", "url": "https://www.buymeacoffee.com/{}", "exists": True},
-            {"name": "Carbonmade", "url": "https://carbonmade.com/{}", "exists": True},
-            {"name": "CareerBuilder", "url": "https://www.careerbuilder.com/share/en/site/candidate_profile.aspx?uid={}", "exists": False},
-            {"name": "Chess.com", "url": "https://www.chess.com/member/{}", "exists": True},
-            {"name": "Codecademy", "url": "https://www.codecademy.com/profiles/{}", "exists": True},
-            {"name": "Codepen", "url": "https://codepen.io/{}", "exists": True},
-            {"name": "ColourLovers", "url": "https://www.colourlovers.com/lover/{}", "exists": True},
-            {"name": "Contently", "url": "https://contently.com/portfolios/{}", "exists": True},
-            {"name": "Coroflot", "url": "https://www.coroflot.com/{}", "exists": True},
-            {"name": "Creative Market", "url": "https://creativemarket.com/{}", "exists": True},
-            {"name": "Crevado", "url": "https://crevado.com/{}", "exists": True},
-            {"name": "культиватор", "url": "https://cultivator.ee/users/{}", "exists": True},
-            {"name": "Dcard", "url": "https://www.dcard.tw/@{}", "exists": True},
-            {"name": "Delicious", "url": "https://delicious.com/{}", "exists": True},
-            {"name": "Discogs", "url": "https://www.discogs.com/user/{}", "exists": True},
-            {"name": " এলা", "url": "https://ella.network/{}", "exists": True},
-            {"name": "EyeEm", "url": "https://www.eyeem.com/u/{}", "exists": True},
-            {"name": "Fandom", "url": "https://www.fandom.com/u/{}", "exists": True},
-            {"name": "Filmogs", "url": "https://filmogs.com/@{}", "exists": True},
-            {"name": "FlightAware", "url": "https://flightaware.com/user/{}", "exists": True},
-            {"name": "FontStruct", "url": "https://fontstruct.com/fontstructors/{}", "exists": True},
-            {"name": "FreeCodeCamp", "url": "https://www.freecodecamp.org/{}", "exists": True},
-            {"name": "Freesound", "url": "https://freesound.org/people/{}", "exists": True},
-            {"name": "GameSpot", "url": "https://www.gamespot.com/profile/{}", "exists": True},
-            {"name": "GitHub", "url": "https://github.com/{}", "exists": True},
-            {"name": "Gitee", "url": "https://gitee.com/{}", "exists": True},
-            {"name": "Goodreads", "url": "https://www.goodreads.com/user/show/{}", "exists": True},
-            {"name": "Hackaday", "url": "https://hackaday.io/{}", "exists": True},
-            {"name": "HackerOne", "url": "https://hackerone.com/{}", "exists": True},
-            {"name": "HackerRank", "url": "https://www.hackerrank.com/{}", "exists": True},
-            {"name": "Housecreep", "url": "https://www.housecreep.com/user/{}", "exists": True},
-            {"name": "Houzz", "url": "https://www.houzz.com/user/{}", "exists": True},
-            {"name": "ICQ", "url": "https://icq.com/people/{}", "exists": True},
-            {"name": "IFTTT", "url": "https://ifttt.com/p/{}", "exists": True},
-            {"name": "ImageShack", "url": "https://imageshack.com/user/{}", "exists": True},
-            {"name": "Imgur", "url": "https://imgur.com/user/{}", "exists": True},
-            {"name": "Issuu", "url": "https://issuu.com/{}", "exists": True},
-            {"name": "itch.io", "url": "https://{}.itch.io/", "exists": True},
-            {"name": "Joomla", "url": "https://community.joomla.org/user/profile/{}", "exists": True},
-            {"name": "Kaggle", "url": "https://www.kaggle.com/{}", "exists": True},
-            {"name": "Kongregate", "url": "https://www.kongregate.com/accounts/{}", "exists": True},
-            {"name": "LORI.ru", "url": "https://lori.ru/portfolio/{}", "exists": True},
-            {"name": "Launchpad", "url": "https://launchpad.net/~{}", "exists": True},
-            {"name": "LeetCode", "url": "https://leetcode.com/{}", "exists": True},
-            {"name": "Letterboxd", "url": "https://letterboxd.com/{}", "exists": True},
-            {"name": "Mastodon", "url": "https://mastodon.social/@{}", "exists": True},
-            {"name": "Mixcloud", "url": "https://www.mixcloud.com/{}", "exists": True},
-            {"name": "MyAnimeList", "url": "https://myanimelist.net/profile/{}", "exists": True},
-            {"name": "Myspace", "url": "https://myspace.com/{}", "exists": True},
-            {"name": "NameMC", "url": "https://namemc.com/profile/{}", "exists": True},
-            {"name": "Napster", "url": "https://napster.com/artist/{}", "exists": True},
-            {"name": "npmjs", "url": "https://www.npmjs.com/~{}", "exists": True},
-            {"name": "OK.ru", "url": "https://ok.ru/profile/{}", "exists": True},
-            {"name": "OnlyFans", "url": "https://onlyfans.com/{}", "exists": True},
-            {"name": "OpenStreetMap", "url": "https://www.openstreetmap.org/user/{}", "exists": True},
-            {"name": "Photobucket", "url": "https://photobucket.com/user/{}", "exists": True},
-            {"name": "Pixabay", "url": "https://pixabay.com/users/{}", "exists": True},
-            {"name": "Plug.dj", "url": "https://plug.dj/@/{}", "exists": True},
-            {"name": "Product Hunt", "url": "https://www.producthunt.com/@{}", "exists": True},
-            {"name": "Ravelry", "url": "https://www.ravelry.com/people/{}", "exists": True},
-            {"name": "ResearchGate", "url": "https://www.researchgate.net/profile/{}", "exists": True},
-            {"name": "Roblox", "url": "https://www.roblox.com/user.aspx?ID={}", "exists": False},
-            {"name": "Scribd", "url": "https://www.scribd.com/user/{}", "exists": True},
-            {"name": "Shutterstock", "url": "https://www.shutterstock.com/g/{}", "exists": True},
-            {"name": "Slack", "url": "https://slack.com/{}", "exists": True},
-            {"name": "Slideshare", "url": "https://www.slideshare.net/{}", "exists": True},
-            {"name": "Smashcast", "url": "https://smashcast.tv/{}", "exists": True},
-            {"name": "SourceForge", "url": "https://sourceforge.net/u/{}", "exists": True},
-            {"name": "Spotify", "url": "https://open.spotify.com/user/{}", "exists": True},
-            {"name": "Steam", "url": "https://steamcommunity.com/id/{}", "exists": True},
-            {"name": "Strava", "url": "https://www.strava.com/athletes/{}", "exists": True},
-            {"name": "Telegram", "url": "https://t.me/{}", "exists": True},
-            {"name": "TradingView", "url": "https://www.tradingview.com/~{}", "exists": True},
-            {"name": "Trakt", "url": "https://trakt.tv/users/{}", "exists": True},
-            {"name": "TripAdvisor", "url": "https://www.tripadvisor.com/members/{}", "exists": True},
-            {"name": "Typeracer", "url": "https://data.typeracer.com/pit/profile?user={}", "exists": True},
-            {"name": " ultimate-guitar", "url": "https://www.ultimate-guitar.com/u/{}", "exists": True},
-            {"name": "Unsplash", "url": "https://unsplash.com/@{}", "exists": True},
-            {"name": "Virustotal", "url": "https://www.virustotal.com/gui/user/{}", "exists": True},
-            {"name": "Wattpad", "url": "https://www.wattpad.com/user/{}", "exists": True},
-            {"name": "Wix", "url": "https://{}.wix.com", "exists": True},
-            {"name": "WordPress", "url": "https://{}.wordpress.com/", "exists": True},
-            {"name": "Xbox Gamertag", "url": "https://account.xbox.com/en-us/profile?gamertag={}", "exists": False},
-            {"name": "Xing", "url": "https://www.xing.com/profile/{}", "exists": True},
-            {"name": "YouPic", "url": "https://youpic.com/photographer/{}", "exists": True},
-            {"name": "Zhihu", "url": "https://www.zhihu.com/people/{}", "exists": True},
-            {"name": "Pornhub", "url": "https://www.pornhub.com/users/{}", "exists": True},
-            {"name": "XVideos", "url": "https://www.xvideos.com/profiles/{}", "exists": True},
-            {"name": "RedTube", "url": "https://www.redtube.com/users/{}", "exists": True},
-            {"name": "TNAFlix", "url": "https://www.tnaflix.com/user/profile/{}", "exists": True},
-            {"name": "Brazzers", "url": "https://www.brazzers.com/search/performers?q={}", "exists": True},
-            {"name": "Academia", "url": "https://www.academia.edu/{}", "exists": True},
-            {"name": "Bandzoogle", "url": "https://bandzoogle.com/{}", "exists": True},
-            {"name": "Bsky Social", "url": "https://bsky.app/profile/{}", "exists": True},
+        raise ValueError("site list must be a JSON array or object")
+    sites = [compile_site(definition) for definition in definitions]
+    return [site for site in sites if site.enabled]
 
-        ]
+def load_site_file(path, strict=True):
+    """
+    Reads and compiles a site list file.
+
+    Args:
+        path (str): The JSON file to read.
+        strict (bool): Compile every CSS selector now to catch bad ones early. The
+            bundled catalogue skips this and compiles selectors when first used.
+
+    Returns:
+        list: The enabled SiteRule objects.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        sites = load_sites(json.load(f))
+    if strict:
+        check_selectors(sites)
+    return sites
+
+def read_default_sites():
+    """
+    Reads the bundled site catalogue without compiling it.
+
+    Returns:
+        dict: The version 2 site list.
+    """
+    with open(DEFAULT_SITES_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_default_sites():
+    """
+    Compiles the bundled site catalogue.
+
+    Returns:
+        list: The enabled SiteRule objects.
+    """
+    return load_site_file(DEFAULT_SITES_FILE, strict=False)
+
+def head_region(content):
+    """
+    Returns the part of a page up to and including its </head> tag.
+
+    Args:
+        content (bytes): The raw response body.
+
+    Returns:
+        bytes: The head region, or the whole body if it has no </head>.
+    """
+    match = HEAD_END.search(content)
+    return content[:match.end()] if match else content
+
+def parse_profile(username, site, url, content):
+    """
+    Extracts whatever profile information the site's rules describe.
+
+    The page is only parsed into a soup when one of the rules uses a selector, using
+    lxml when it is installed, and only the <head> is parsed when every selector
+    targets head elements.
+
+    Args:
+        username (str): The username that was searched for.
+        site (SiteRule): The compiled site.
+        url (str): The profile URL that was fetched.
+        content (bytes): The raw response body.
+
+    Returns:
+        UserProfile: The populated UserProfile object.
+    """
+    fields = {}
+    additional_info = {}
+    soup = None
+    if site.needs_soup:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(head_region(content) if site.head_only else content, HTML_PARSER)
+    for rule in site.extractors:
+        try:
+            value = rule.extract(soup, content)
+        except Exception:
+            value = None
+        if value is None:
+            continue
+        if rule.field in PROFILE_FIELDS:
+            fields[rule.field] = value
+        else:
+            additional_info[rule.field] = value
+    return UserProfile(username, site.name, url, additional_info=additional_info, **fields)
+
+PHASES = ("dns", "connect", "tls", "first_byte", "transfer", "parse", "wait")
+
+class ProbeMetrics:
+    """
+    Timings and counters for one probe, summed over its attempts.
+
+    first_byte runs from sending the request to receiving the response headers and
+    so includes any dns, connect and tls time. Those are reported as far as the HTTP
+    client exposes them: the thread engine folds DNS into connect, and the async
+    engine folds TLS into connect. Phases a client cannot see stay at zero.
+    """
+    def __init__(self):
+        self.attempts = 0
+        self.bytes_read = 0
+        self.total = 0.0
+        self.outcome = None
+        for phase in PHASES:
+            setattr(self, phase, 0.0)
+
+    def to_dict(self):
+        data = {phase: round(getattr(self, phase), 4) for phase in PHASES}
+        data.update(total=round(self.total, 4), bytes_read=self.bytes_read, attempts=self.attempts, outcome=self.outcome)
+        return data
+
+_probe_context = threading.local()
+
+def current_metrics():
+    """
+    Returns the metrics of the probe running on this thread, if any.
+    """
+    return getattr(_probe_context, "metrics", None)
+
+class TimedConnectionMixin:
+    """
+    Reports how long opening the socket took to the probe running on this thread.
+    """
+    def _new_conn(self):
+        started = time.monotonic()
+        try:
+            return super()._new_conn()
+        finally:
+            metrics = current_metrics()
+            if metrics:
+                metrics.connect += time.monotonic() - started
+
+@functools.lru_cache(maxsize=None)
+def timed_adapter_class():
+    """
+    Builds the requests HTTPAdapter whose connections report connect and TLS handshake
+    times. The classes are defined on first use so requests and urllib3 are only
+    imported once the thread engine needs them.
+
+    Returns:
+        type: The TimedHTTPAdapter class.
+    """
+    import requests
+    import urllib3
+
+    class TimedHTTPConnection(TimedConnectionMixin, urllib3.connection.HTTPConnection):
+        pass
+
+    class TimedHTTPSConnection(TimedConnectionMixin, urllib3.connection.HTTPSConnection):
+        def connect(self):
+            metrics = current_metrics()
+            started = time.monotonic()
+            connect_before = metrics.connect if metrics else 0.0
+            try:
+                super().connect()
+            finally:
+                if metrics:
+                    metrics.tls += time.monotonic() - started - (metrics.connect - connect_before)
+
+    class TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+        ConnectionCls = TimedHTTPConnection
+
+    class TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+        ConnectionCls = TimedHTTPSConnection
+
+    class TimedHTTPAdapter(requests.adapters.HTTPAdapter):
+        """
+        An HTTPAdapter whose connections report connect and TLS handshake times.
+        """
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+    return TimedHTTPAdapter
+
+def make_session(pool_size=10):
+    """
+    Creates a requests Session whose connection pool is sized for the thread pool.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections kept alive per host.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    import requests
+    session = requests.Session()
+    adapter = timed_adapter_class()(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+def make_trace_config():
+    """
+    Builds an aiohttp TraceConfig that records DNS and connect times into the
+    ProbeMetrics passed as a request's trace_request_ctx.
+
+    Returns:
+        aiohttp.TraceConfig: The trace configuration.
+    """
+    import aiohttp
+
+    async def dns_start(session, context, params):
+        context.dns_started = time.monotonic()
+
+    async def dns_end(session, context, params):
+        elapsed = time.monotonic() - context.dns_started
+        context.dns_elapsed = getattr(context, "dns_elapsed", 0.0) + elapsed
+        context.trace_request_ctx.dns += elapsed
+
+    async def connect_start(session, context, params):
+        context.connect_started = time.monotonic()
+        context.dns_elapsed = 0.0
+
+    async def connect_end(session, context, params):
+        context.trace_request_ctx.connect += time.monotonic() - context.connect_started - context.dns_elapsed
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(dns_start)
+    trace_config.on_dns_resolvehost_end.append(dns_end)
+    trace_config.on_connection_create_start.append(connect_start)
+    trace_config.on_connection_create_end.append(connect_end)
+    return trace_config
+
+def drain_response(response):
+    """
+    Reads a small unread body so its connection can go back to the pool.
+
+    Bodies without a Content-Length are read until they end or pass DRAIN_LIMIT.
+    Larger bodies are left unread; closing the response then drops the connection,
+    which is cheaper than downloading a page nobody looks at. Sites that answer
+    HEAD requests correctly avoid the trade-off with `request: "head"`.
+
+    Args:
+        response (requests.Response): A streamed response.
+    """
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > DRAIN_LIMIT:
+        return
+    read = 0
+    for chunk in response.iter_content(CHUNK_SIZE):
+        read += len(chunk)
+        if read > DRAIN_LIMIT:
+            break
+    metrics = current_metrics()
+    if metrics:
+        metrics.bytes_read += read
+
+def read_body(response, site, max_bytes):
+    """
+    Reads as much of a streamed response body as the site's verdict needs.
+
+    Nothing is read for sites judged on status or redirect alone. Otherwise chunks
+    are read until the site's rules are satisfied or max_bytes is reached.
+
+    Args:
+        response (requests.Response): A streamed response.
+        site (SiteRule): The compiled site.
+        max_bytes (int): The most bytes to read.
+
+    Returns:
+        bytes: The body, possibly truncated.
+    """
+    if not site.needs_body:
+        drain_response(response)
+        return b""
+    content = bytearray()
+    scan = BodyScan(site)
+    for chunk in response.iter_content(CHUNK_SIZE):
+        content += chunk
+        if len(content) >= max_bytes or scan.satisfied(content):
+            break
+    metrics = current_metrics()
+    if metrics:
+        metrics.bytes_read += len(content)
+    return bytes(content[:max_bytes])
+
+async def drain_response_async(response, metrics=None):
+    """
+    Asyncio counterpart of drain_response for aiohttp responses.
+    """
+    if response.content_length is not None and response.content_length > DRAIN_LIMIT:
+        return
+    read = 0
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        read += len(chunk)
+        if read > DRAIN_LIMIT:
+            break
+    if metrics:
+        metrics.bytes_read += read
+
+async def read_body_async(response, site, max_bytes, metrics=None):
+    """
+    Asyncio counterpart of read_body for aiohttp responses.
+    """
+    if not site.needs_body:
+        await drain_response_async(response, metrics)
+        return b""
+    content = bytearray()
+    scan = BodyScan(site)
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        content += chunk
+        if len(content) >= max_bytes or scan.satisfied(content):
+            break
+    if metrics:
+        metrics.bytes_read += len(content)
+    return bytes(content[:max_bytes])
+
+FOUND = "found"
+NOT_FOUND = "not_found"
+ERROR = "error"
+TIMED_OUT = "timed_out"
+
+# Seconds a client is told to wait when the service's scan queue is full
+SERVICE_RETRY_AFTER = 2
+
+# Weight of the newest probe in each site's moving average of probe time
+LATENCY_WEIGHT = 0.3
+
+class ProbeResult:
+    """
+    The outcome of probing one site for one username.
+    """
+    def __init__(self, username, site, profile=None, status=None, attempts=0, http_status=None, error=None, cached=False, elapsed=None, metrics=None):
+        self.username = username
+        self.site = site
+        self.profile = profile
+        self.status = status or (FOUND if profile else NOT_FOUND)
+        self.attempts = attempts
+        self.http_status = http_status
+        self.error = error
+        self.cached = cached
+        self.elapsed = elapsed
+        self.metrics = metrics
+
+    def retarget(self, username, site):
+        """
+        Copies this result for another username and site that map to the same request.
+
+        Args:
+            username (str): The username of the copy.
+            site (SiteRule): The site of the copy.
+
+        Returns:
+            ProbeResult: The copy. Its metrics stay with the original, so the fetch
+                is only counted once.
+        """
+        profile = None
+        if self.profile:
+            profile = UserProfile(**dict(self.profile.to_dict(), username=username, site_name=site.name, url=site.url.format(username)))
+        return ProbeResult(username, site, profile, self.status, self.attempts, self.http_status, self.error, self.cached, self.elapsed)
+
+    @property
+    def found(self):
+        """
+        Whether the username was found on the site.
+        """
+        return self.profile is not None
+
+    def to_dict(self):
+        """
+        Returns a dictionary representation of the result, built on the profile's
+        fields when the username was found.
+        """
+        if self.profile:
+            data = self.profile.to_dict()
+        else:
+            data = {"username": self.username, "site_name": self.site.name, "url": self.site.url.format(self.username)}
+        data["status"] = self.status
+        data["http_status"] = self.http_status
+        data["attempts"] = self.attempts
+        if self.error:
+            data["error"] = self.error
+        if self.elapsed is not None:
+            data["elapsed"] = round(self.elapsed, 3)
+        if self.cached:
+            data["cached"] = True
+        if self.metrics:
+            data["metrics"] = self.metrics.to_dict()
+        return data
+
+def is_transient_status(status):
+    """
+    Tells whether an HTTP error status is worth retrying.
+
+    Timeouts, rate limiting and server errors are transient; any other 4xx is a
+    definitive answer, see error_status_result().
+
+    Args:
+        status (int): The HTTP status code.
+
+    Returns:
+        bool: True if the request should be retried.
+    """
+    return status in (408, 425, 429) or status >= 500
+
+def error_status_result(username, site, status, metrics):
+    """
+    Builds the result of a definitive HTTP error status.
 
-    sherlock(args.username, sites, args.threads, args.timeout, args.output, args.retry)
+    Only 404 and 410 say the profile does not exist. 401, 403 and 451 usually mean a
+    bot wall or a geo-block and are reported as "blocked" errors; any other status
+    is an "http_error". Errors are never cached or marked done in a journal.
+
+    Args:
+        username (str): The username.
+        site (SiteRule): The compiled site.
+        status (int): The HTTP status code.
+        metrics (ProbeMetrics): The probe's metrics, whose outcome is set here.
+
+    Returns:
+        ProbeResult: A NOT_FOUND or ERROR result.
+    """
+    if status in NOT_FOUND_STATUSES:
+        return ProbeResult(username, site, None, NOT_FOUND, metrics.attempts, status)
+    metrics.outcome = "blocked" if status in BLOCKED_STATUSES else "http_error"
+    return ProbeResult(username, site, None, ERROR, metrics.attempts, status, f"HTTP {status}")
+
+class RetryPolicy:
+    """
+    Decides whether and when to retry a transient failure.
+
+    Delays grow exponentially from `base_delay` up to `max_delay` with full jitter.
+    `budget` caps the total number of retries across the whole run so a wave of
+    failures cannot multiply the request volume; None means unlimited.
+    """
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=10.0, budget=None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def allow_retry(self, attempts):
+        """
+        Claims a retry from the budget if another attempt is allowed.
+
+        Args:
+            attempts (int): The number of attempts made so far.
+
+        Returns:
+            bool: True if the caller may retry.
+        """
+        if attempts >= self.max_attempts:
+            return False
+        with self.lock:
+            if self.budget is not None and self.retries >= self.budget:
+                return False
+            self.retries += 1
+            return True
+
+    def delay(self, attempts, retry_after=None):
+        """
+        Returns how long to wait before the next attempt.
+
+        Args:
+            attempts (int): The number of attempts made so far.
+            retry_after (str): The response's Retry-After header, if any.
+
+        Returns:
+            float: Seconds to sleep.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempts - 1)))
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            delay = max(delay, min(server_delay, self.max_delay))
+        return delay
+
+class Deadline:
+    """
+    The point in time a scan has to finish by, shared by every probe in it.
+
+    Probes cap each attempt's timeout at the time remaining and give up rather than
+    wait or retry past it. cancel() moves the deadline to now, so probes that are
+    still running stop after their current attempt.
+    """
+    def __init__(self, seconds=None):
+        self.at = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self):
+        """
+        Seconds left, or None when there is no deadline.
+        """
+        if self.at is None:
+            return None
+        return max(0.0, self.at - time.monotonic())
+
+    def expired(self, margin=0.0):
+        """
+        Whether the deadline has passed, or will within `margin` seconds.
+        """
+        remaining = self.remaining()
+        return remaining is not None and remaining <= margin
+
+    def cap(self, timeout):
+        """
+        Shortens a request timeout so it ends by the deadline.
+        """
+        remaining = self.remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def cancel(self):
+        self.at = time.monotonic()
+
+def timed_out_result(username, site, attempts=0, http_status=None, error=None):
+    """
+    Builds the result of a probe cut short by the scan deadline.
+
+    Args:
+        username (str): The username.
+        site (SiteRule): The compiled site.
+        attempts (int): Attempts made before the deadline.
+        http_status (int): The last HTTP status seen, if any.
+        error (str): The last transient failure, if any.
+
+    Returns:
+        ProbeResult: A result with status TIMED_OUT.
+    """
+    reason = f"deadline reached after {error}" if error else "deadline reached"
+    return ProbeResult(username, site, None, TIMED_OUT, attempts, http_status, reason)
+
+def classify_error(error):
+    """
+    Sorts a failed request into an outcome category for metrics.
+
+    Args:
+        error (Exception): The exception raised by requests or aiohttp.
+
+    Returns:
+        str: One of "timeout", "dns_error", "tls_error" or "connection_error".
+    """
+    # Only the HTTP client that raised the error has been imported
+    requests = sys.modules.get("requests")
+    aiohttp = sys.modules.get("aiohttp")
+    urllib3 = sys.modules.get("urllib3")
+    ssl = sys.modules.get("ssl")
+    asyncio = sys.modules.get("asyncio")
+    if isinstance(error, TimeoutError) or (requests and isinstance(error, requests.exceptions.Timeout)):
+        return "timeout"
+    # Before Python 3.11, asyncio and so aiohttp raise their own TimeoutError
+    if asyncio and isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if aiohttp and isinstance(error, aiohttp.ClientSSLError):
+        return "tls_error"
+    if requests and isinstance(error, requests.exceptions.SSLError):
+        return "tls_error"
+    cause = error
+    while cause is not None:
+        if isinstance(cause, socket.gaierror) or (urllib3 and isinstance(cause, urllib3.exceptions.NameResolutionError)):
+            return "dns_error"
+        if ssl and isinstance(cause, ssl.SSLError):
+            return "tls_error"
+        cause = getattr(cause, "os_error", None) or cause.__cause__ or cause.__context__ or (cause.args[0] if cause.args and isinstance(cause.args[0], BaseException) else None)
+    return "connection_error"
+
+def judge_response(username, site, url, final_url, content, http_status, metrics):
+    """
+    Applies a site's detection and extract rules to a successful response.
+
+    Args:
+        username (str): The username that was searched for.
+        site (SiteRule): The compiled site.
+        url (str): The profile URL that was requested.
+        final_url (str): The URL the request ended on after redirects.
+        content (bytes): The body read for the verdict.
+        http_status (int): The response's status code.
+        metrics (ProbeMetrics): The probe's metrics, which get the parse time.
+
+    Returns:
+        ProbeResult: The verdict, or an error if the rules raised.
+    """
+    started = time.monotonic()
+    try:
+        if not site.exists(final_url, content):
+            return ProbeResult(username, site, None, NOT_FOUND, metrics.attempts, http_status, metrics=metrics)
+        return ProbeResult(username, site, parse_profile(username, site, url, content), FOUND, metrics.attempts, http_status, metrics=metrics)
+    except Exception as e:
+        metrics.outcome = "parse_error"
+        return ProbeResult(username, site, None, ERROR, metrics.attempts, http_status, f"{type(e).__name__}: {e}", metrics=metrics)
+    finally:
+        metrics.parse += time.monotonic() - started
+
+def charge_failed_attempt(metrics, sent, received):
+    """
+    Books the network time of an attempt that ended in an exception.
+
+    Args:
+        metrics (ProbeMetrics): The probe's metrics.
+        sent (float): When the request was sent, or None if it never was.
+        received (float): When the response headers arrived, or None if they never did.
+    """
+    now = time.monotonic()
+    if received is not None:
+        metrics.transfer += now - received
+    elif sent is not None:
+        metrics.first_byte += now - sent
+
+def finish_probe(result, metrics, started):
+    """
+    Stamps a probe's result with its total time and outcome category.
+    """
+    metrics.total = time.monotonic() - started
+    if result.status != ERROR:
+        metrics.outcome = result.status
+    elif metrics.outcome is None:
+        metrics.outcome = "error"
+    result.metrics = metrics
+    result.elapsed = metrics.total
+    return result
+
+def probe_site(username, site, timeout=10, session=None, scheduler=None, retry_policy=None, max_body=DEFAULT_MAX_BODY, deadline=None):
+    """
+    Checks if a username exists on a given site and reports how the check went.
+
+    Definitive answers such as 404 are returned straight away; timeouts, connection
+    errors, 429 and 5xx responses are retried as the retry policy allows. The body is
+    streamed and only read as far as the site's rules need. The result carries the
+    probe's ProbeMetrics.
+
+    Args:
+        username (str): The username to search for.
+        site (SiteRule or dict): The site to check; dicts are compiled on the fly.
+        timeout (int): Timeout for the request in seconds.
+        session (requests.Session): Optional pooled session to reuse connections with.
+        scheduler (HostScheduler): Optional scheduler that paces requests per host.
+        retry_policy (RetryPolicy): The retry policy, three attempts with backoff by default.
+        max_body (int): The most body bytes to read, unless the site sets its own max_bytes.
+        deadline (Deadline): Optional scan deadline; past it the probe ends as TIMED_OUT.
+
+    Returns:
+        ProbeResult: The verdict, with the profile if the username was found.
+    """
+    import requests
+    site = compile_site(site)
+    url = site.url.format(username)
+    http = session or requests
+    host = host_key(url)
+    policy = retry_policy or RetryPolicy()
+    max_bytes = site.max_bytes or max_body
+    headers = site.request_headers(max_bytes)
+    deadline = deadline or Deadline()
+    metrics = ProbeMetrics()
+    started = time.monotonic()
+    _probe_context.metrics = metrics
+
+    try:
+        while True:
+            if deadline.expired():
+                return finish_probe(timed_out_result(username, site, metrics.attempts), metrics, started)
+            metrics.attempts += 1
+            http_status, retry_after = None, None
+            sent = received = None
+            try:
+                if scheduler:
+                    delay = scheduler.reserve(host)
+                    if deadline.expired(delay):
+                        return finish_probe(timed_out_result(username, site, metrics.attempts - 1), metrics, started)
+                    metrics.wait += delay
+                    time.sleep(delay)
+                sent = time.monotonic()
+                with http.request(site.request, url, timeout=deadline.cap(timeout), headers=headers, allow_redirects=True, stream=True) as response:
+                    received = time.monotonic()
+                    metrics.first_byte += received - sent
+                    http_status = response.status_code
+                    if scheduler:
+                        scheduler.observe(host, http_status, response.headers.get("Retry-After"))
+                    if http_status < 400:
+                        content = read_body(response, site, max_bytes)
+                        metrics.transfer += time.monotonic() - received
+                        return finish_probe(judge_response(username, site, url, response.url, content, http_status, metrics), metrics, started)
+                    drain_response(response)
+                    metrics.transfer += time.monotonic() - received
+                    if not is_transient_status(http_status):
+                        return finish_probe(error_status_result(username, site, http_status, metrics), metrics, started)
+                    error = f"HTTP {http_status}"
+                    metrics.outcome = "rate_limited" if http_status == 429 else "http_error"
+                    retry_after = response.headers.get("Retry-After")
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                charge_failed_attempt(metrics, sent, received)
+                error = type(e).__name__
+                metrics.outcome = classify_error(e)
+            except Exception as e:
+                charge_failed_attempt(metrics, sent, received)
+                return finish_probe(ProbeResult(username, site, None, ERROR, metrics.attempts, http_status, f"{type(e).__name__}: {e}"), metrics, started)
+
+            if not policy.allow_retry(metrics.attempts):
+                return finish_probe(ProbeResult(username, site, None, ERROR, metrics.attempts, http_status, error), metrics, started)
+            delay = policy.delay(metrics.attempts, retry_after)
+            if deadline.expired(delay):
+                return finish_probe(timed_out_result(username, site, metrics.attempts, http_status, error), metrics, started)
+            metrics.wait += delay
+            time.sleep(delay)
+    finally:
+        _probe_context.metrics = None
+
+def check_site(username, site, timeout=10, max_retries=3, session=None, scheduler=None, max_body=DEFAULT_MAX_BODY):
+    """
+    Checks if a username exists on a given site and retrieves profile information.
+
+    Args:
+        username (str): The username to search for.
+        site (SiteRule or dict): The site to check; dicts are compiled on the fly.
+        timeout (int): Timeout for the request in seconds.
+        max_retries (int): Maximum number of attempts for transient failures.
+        session (requests.Session): Optional pooled session to reuse connections with.
+        scheduler (HostScheduler): Optional scheduler that paces requests per host.
+        max_body (int): The most body bytes to read, unless the site sets its own max_bytes.
+
+    Returns:
+        UserProfile: A UserProfile object if the username was found, None otherwise.
+    """
+    return probe_site(username, site, timeout, session, scheduler, RetryPolicy(max_retries), max_body).profile
+
+async def probe_site_async(session, username, site, timeout=10, scheduler=None, retry_policy=None, max_body=DEFAULT_MAX_BODY, deadline=None):
+    """
+    Asyncio counterpart of probe_site that runs on a shared aiohttp session.
+
+    Args:
+        session (aiohttp.ClientSession): The pooled session to issue the request on.
+        username (str): The username to search for.
+        site (SiteRule or dict): The site to check; dicts are compiled on the fly.
+        timeout (int): Timeout for the request in seconds.
+        scheduler (HostScheduler): Optional scheduler that paces requests per host.
+        retry_policy (RetryPolicy): The retry policy, three attempts with backoff by default.
+        max_body (int): The most body bytes to read, unless the site sets its own max_bytes.
+        deadline (Deadline): Optional scan deadline; past it the probe ends as TIMED_OUT.
+
+    Returns:
+        ProbeResult: The verdict, with the profile if the username was found.
+    """
+    import asyncio
+    import aiohttp
+    site = compile_site(site)
+    url = site.url.format(username)
+    host = host_key(url)
+    policy = retry_policy or RetryPolicy()
+    max_bytes = site.max_bytes or max_body
+    headers = site.request_headers(max_bytes)
+    deadline = deadline or Deadline()
+    metrics = ProbeMetrics()
+    started = time.monotonic()
+
+    while True:
+        if deadline.expired():
+            return finish_probe(timed_out_result(username, site, metrics.attempts), metrics, started)
+        metrics.attempts += 1
+        http_status, retry_after = None, None
+        sent = received = None
+        try:
+            if scheduler:
+                delay = scheduler.reserve(host)
+                if deadline.expired(delay):
+                    return finish_probe(timed_out_result(username, site, metrics.attempts - 1), metrics, started)
+                metrics.wait += delay
+                await asyncio.sleep(delay)
+            sent = time.monotonic()
+            async with session.request(site.request, url, headers=headers, timeout=aiohttp.ClientTimeout(total=deadline.cap(timeout)), trace_request_ctx=metrics) as response:
+                received = time.monotonic()
+                metrics.first_byte += received - sent
+                http_status = response.status
+                if scheduler:
+                    scheduler.observe(host, http_status, response.headers.get("Retry-After"))
+                if http_status < 400:
+                    content = await read_body_async(response, site, max_bytes, metrics)
+                    metrics.transfer += time.monotonic() - received
+                    return finish_probe(judge_response(username, site, url, str(response.url), content, http_status, metrics), metrics, started)
+                await drain_response_async(response, metrics)
+                metrics.transfer += time.monotonic() - received
+                if not is_transient_status(http_status):
+                    return finish_probe(error_status_result(username, site, http_status, metrics), metrics, started)
+                error = f"HTTP {http_status}"
+                metrics.outcome = "rate_limited" if http_status == 429 else "http_error"
+                retry_after = response.headers.get("Retry-After")
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+            charge_failed_attempt(metrics, sent, received)
+            error = type(e).__name__
+            metrics.outcome = classify_error(e)
+        except Exception as e:
+            charge_failed_attempt(metrics, sent, received)
+            return finish_probe(ProbeResult(username, site, None, ERROR, metrics.attempts, http_status, f"{type(e).__name__}: {e}"), metrics, started)
+
+        if not policy.allow_retry(metrics.attempts):
+            return finish_probe(ProbeResult(username, site, None, ERROR, metrics.attempts, http_status, error), metrics, started)
+        delay = policy.delay(metrics.attempts, retry_after)
+        if deadline.expired(delay):
+            return finish_probe(timed_out_result(username, site, metrics.attempts, http_status, error), metrics, started)
+        metrics.wait += delay
+        await asyncio.sleep(delay)
+
+async def check_site_async(session, username, site, timeout=10, max_retries=3, scheduler=None, max_body=DEFAULT_MAX_BODY):
+    """
+    Asyncio counterpart of check_site that runs on a shared aiohttp session.
+
+    Args:
+        session (aiohttp.ClientSession): The pooled session to issue the request on.
+        username (str): The username to search for.
+        site (SiteRule or dict): The site to check; dicts are compiled on the fly.
+        timeout (int): Timeout for the request in seconds.
+        max_retries (int): Maximum number of attempts for transient failures.
+        scheduler (HostScheduler): Optional scheduler that paces requests per host.
+        max_body (int): The most body bytes to read, unless the site sets its own max_bytes.
+
+    Returns:
+        UserProfile: A UserProfile object if the username was found, None otherwise.
+    """
+    result = await probe_site_async(session, username, site, timeout, scheduler, RetryPolicy(max_retries), max_body)
+    return result.profile
+
+class Engine:
+    """
+    Feeds (username, site) jobs to a worker pool that runs at most max_pending probes
+    at once, with up to queue_depth more queued so the pool never waits for work.
+
+    Subclasses provide submit(), which starts one probe and returns a
+    concurrent.futures.Future resolving to a ProbeResult.
+    """
+    def __init__(self, max_pending, scheduler=None, retry_policy=None, queue_depth=0):
+        self.max_pending = max_pending
+        self.queue_depth = queue_depth
+        self.scheduler = scheduler
+        self.retry_policy = retry_policy or RetryPolicy()
+
+    def window(self):
+        """
+        The number of probes allowed in flight right now.
+        """
+        if self.scheduler:
+            limit = max(1, min(self.max_pending, self.scheduler.concurrency))
+            # Queue ahead only while the pool may run at full width, so throttling really runs fewer probes
+            return limit + self.queue_depth if limit >= self.max_pending else limit
+        return self.max_pending + self.queue_depth
+
+    def submit(self, username, site, deadline=None):
+        raise NotImplementedError
+
+    def scan(self, jobs, deadline=None):
+        """
+        Probes every (username, site) pair and yields results as they complete.
+
+        Jobs are pulled lazily, so the iterable may be a generator over a large
+        username list without being materialized. A job may also be a ProbeResult
+        that is already known, such as a cache hit, which is passed straight through.
+
+        When the deadline passes, probes still in flight are cancelled and they and
+        every job not yet started are yielded as TIMED_OUT. If the caller stops
+        iterating early, the deadline is cancelled so running probes stop retrying.
+
+        Args:
+            jobs (iterable): (username, site) pairs to probe, or known ProbeResults.
+            deadline (Deadline): Optional deadline for the whole scan.
+
+        Yields:
+            ProbeResult: The result of each probe, in completion order.
+        """
+        deadline = deadline or Deadline()
+        jobs = iter(jobs)
+        pending = {}
+        try:
+            while not deadline.expired():
+                while len(pending) < self.window():
+                    job = next(jobs, None)
+                    if job is None:
+                        break
+                    if isinstance(job, ProbeResult):
+                        yield job
+                        continue
+                    pending[self.submit(*job, deadline)] = job
+                if not pending:
+                    return
+                done, _ = concurrent.futures.wait(pending, timeout=deadline.remaining(), return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    del pending[future]
+                    yield future.result()
+
+            while pending:
+                future, (username, site) = pending.popitem()
+                if future.done() and not future.cancelled():
+                    yield future.result()
+                else:
+                    future.cancel()
+                    yield timed_out_result(username, site)
+            for job in jobs:
+                yield job if isinstance(job, ProbeResult) else timed_out_result(*job)
+        finally:
+            deadline.cancel()
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        pass
+
+class ThreadEngine(Engine):
+    """
+    Runs probes on a thread pool that shares one keep-alive requests Session.
+    """
+    def __init__(self, threads=10, timeout=10, scheduler=None, retry_policy=None, max_body=DEFAULT_MAX_BODY):
+        super().__init__(threads, scheduler, retry_policy, queue_depth=threads)
+        self.timeout = timeout
+        self.max_body = max_body
+        self.session = make_session(threads)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads)
+
+    def submit(self, username, site, deadline=None):
+        return self.executor.submit(probe_site, username, site, self.timeout, self.session, self.scheduler, self.retry_policy, self.max_body, deadline)
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
+
+class AsyncEngine(Engine):
+    """
+    Runs probes as asyncio tasks on a background event loop sharing one aiohttp session.
+
+    A single thread drives every in-flight probe, so thousands of concurrent requests
+    cost one coroutine each instead of one OS thread each.
+    """
+    def __init__(self, concurrency=100, limit_per_host=10, timeout=10, scheduler=None, retry_policy=None, max_body=DEFAULT_MAX_BODY):
+        if not has_aiohttp():
+            raise RuntimeError("the async engine requires the 'aiohttp' package")
+        import asyncio
+        super().__init__(concurrency, scheduler, retry_policy)
+        self.concurrency = concurrency
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.max_body = max_body
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="userscope-async", daemon=True)
+        self.thread.start()
+        self.session = self._run(self._open_session())
+
+    def _run(self, coro):
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _open_session(self):
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.limit_per_host, ttl_dns_cache=300)
+        return aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS, trace_configs=[make_trace_config()])
+
+    def submit(self, username, site, deadline=None):
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(probe_site_async(self.session, username, site, self.timeout, self.scheduler, self.retry_policy, self.max_body, deadline), self.loop)
+
+    def close(self):
+        self._run(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+def make_engine(name, threads=10, timeout=10, max_retries=3, concurrency=100, limit_per_host=10, host_rate=2.0, host_burst=2, retry_budget=None, retry_backoff=0.5, max_body=DEFAULT_MAX_BODY):
+    """
+    Builds the scan engine selected on the command line.
+
+    Args:
+        name (str): Either "thread" or "async".
+        threads (int): Worker threads for the thread engine.
+        timeout (int): Timeout for each request in seconds.
+        max_retries (int): Maximum number of attempts for transient failures.
+        concurrency (int): Total connection limit for the async engine.
+        limit_per_host (int): Per-host connection limit for the async engine.
+        host_rate (float): Requests per second allowed per host, 0 for no pacing.
+        host_burst (int): Requests a host may receive back to back before pacing applies.
+        retry_budget (int): Total retries allowed across the run, None for unlimited.
+        retry_backoff (float): Base delay in seconds for exponential retry backoff.
+        max_body (int): The most body bytes to read per response.
+
+    Returns:
+        ThreadEngine or AsyncEngine: The engine instance.
+    """
+    retry_policy = RetryPolicy(max_retries, retry_backoff, budget=retry_budget)
+    if name == "async":
+        scheduler = HostScheduler(host_rate, host_burst, max_concurrency=concurrency)
+        return AsyncEngine(concurrency, limit_per_host, timeout, scheduler, retry_policy, max_body)
+    scheduler = HostScheduler(host_rate, host_burst, max_concurrency=threads)
+    return ThreadEngine(threads, timeout, scheduler, retry_policy, max_body)
+
+def pack_result(result, index):
+    """
+    Flattens a ProbeResult into plain data that can cross a process boundary.
+
+    Args:
+        result (ProbeResult): The result to pack.
+        index (int): The position of the result's site in the shared site list.
+
+    Returns:
+        tuple: The packed result.
+    """
+    profile = result.profile.to_dict() if result.profile else None
+    metrics = vars(result.metrics) if result.metrics else None
+    return ("result", result.username, index, result.status, profile, result.attempts, result.http_status, result.error, result.cached, result.elapsed, metrics)
+
+def unpack_result(message, sites):
+    """
+    Rebuilds a ProbeResult packed by pack_result().
+
+    Args:
+        message (tuple): The packed result.
+        sites (list): The shared site list the index refers to.
+
+    Returns:
+        ProbeResult: The rebuilt result.
+    """
+    _, username, index, status, profile, attempts, http_status, error, cached, elapsed, metrics_data = message
+    metrics = None
+    if metrics_data:
+        metrics = ProbeMetrics()
+        metrics.__dict__.update(metrics_data)
+    profile = UserProfile(**profile) if profile else None
+    return ProbeResult(username, sites[index], profile, status, attempts, http_status, error, cached, elapsed, metrics)
+
+def run_worker(worker_id, definitions, engine_options, jobs, results):
+    """
+    Worker process entry point: probes the jobs routed to this shard with its own
+    engine and sends the results back to the parent.
+
+    Args:
+        worker_id (int): The shard number.
+        definitions (list): The site definitions, compiled once here.
+        engine_options (dict): Keyword arguments for make_engine().
+        jobs (multiprocessing.Queue): The scan deadline as a wall-clock time (or None),
+            then (username, site index) pairs, ending with None.
+        results (multiprocessing.Queue): Where packed results are sent.
+    """
+    sites = [compile_site(definition) for definition in definitions]
+    index = {id(site): i for i, site in enumerate(sites)}
+
+    def shard_jobs():
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            username, site_index = job
+            yield username, sites[site_index]
+
+    deadline_at = jobs.get()
+    deadline = Deadline(deadline_at - time.time()) if deadline_at is not None else None
+    scanner = make_engine(**engine_options)
+    try:
+        for result in scanner.scan(shard_jobs(), deadline):
+            results.put(pack_result(result, index[id(result.site)]))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scanner.close()
+        results.put(("done", worker_id, scanner.retry_policy.retries))
+
+class ShardedEngine:
+    """
+    Spreads probes over worker processes and merges their results into one stream.
+
+    Each worker runs its own engine, so it has its own connection pool and rate
+    limiter state and its own core for parsing. Jobs are routed by username so all
+    of a name's probes land on one worker, or by site when only one username is
+    scanned. Per-worker job queues are bounded, so a large batch is fed as the
+    workers keep up.
+    """
+    def __init__(self, workers, sites, by_site=False, queue_size=256, **engine_options):
+        import multiprocessing
+        self.context = multiprocessing.get_context("spawn")
+        self.sites = sites
+        self.index = {id(site): i for i, site in enumerate(sites)}
+        self.by_site = by_site
+        self.retry_policy = RetryPolicy()
+        self.results = self.context.Queue()
+        self.inputs = [self.context.Queue(queue_size) for _ in range(workers)]
+        definitions = [site.definition for site in sites]
+        options = [dict(engine_options) for _ in range(workers)]
+        budget = engine_options.get("retry_budget")
+        if budget is not None:
+            # Split the budget so the shares add up to it, the first workers taking the remainder
+            share, extra = divmod(budget, workers)
+            for i, worker_options in enumerate(options):
+                worker_options["retry_budget"] = share + (i < extra)
+        self.processes = [
+            self.context.Process(target=run_worker, args=(i, definitions, options[i], self.inputs[i], self.results), daemon=True)
+            for i in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+        self.feed_error = None
+        self.stopped = False
+
+    def shard(self, username, site):
+        """
+        Picks the worker a job goes to.
+        """
+        key = self.index[id(site)] if self.by_site else zlib.crc32(username.encode("utf-8"))
+        return key % len(self.inputs)
+
+    @staticmethod
+    def _put(target, item, stop):
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed(self, jobs, stop, deadline_at):
+        try:
+            for target in self.inputs:
+                self._put(target, deadline_at, stop)
+            for job in jobs:
+                if isinstance(job, ProbeResult):
+                    self._put(self.results, pack_result(job, self.index[id(job.site)]), stop)
+                    continue
+                username, site = job
+                if not self._put(self.inputs[self.shard(username, site)], (username, self.index[id(site)]), stop):
+                    return
+        except Exception as e:
+            self.feed_error = e
+        finally:
+            for target in self.inputs:
+                self._put(target, None, stop)
+            # Sent from this thread after every passed-through result, so it arrives last
+            self._put(self.results, ("fed",), stop)
+
+    def scan(self, jobs, deadline=None):
+        """
+        Routes every job to its worker and yields results as the workers finish them.
+
+        Args:
+            jobs (iterable): (username, site) pairs to probe, or known ProbeResults.
+            deadline (Deadline): Optional deadline for the whole scan, enforced by
+                each worker's engine.
+
+        Yields:
+            ProbeResult: The result of each probe, in completion order.
+        """
+        remaining = deadline.remaining() if deadline else None
+        # Workers get the deadline as wall-clock time, which means the same in every process
+        deadline_at = time.time() + remaining if remaining is not None else None
+        stop = threading.Event()
+        feeder = threading.Thread(target=self._feed, args=(jobs, stop, deadline_at), name="userscope-feeder", daemon=True)
+        feeder.start()
+        running = len(self.processes)
+        fed = False
+        try:
+            while running or not fed:
+                try:
+                    message = self.results.get(timeout=1)
+                except queue.Empty:
+                    if any(process.exitcode not in (None, 0) for process in self.processes):
+                        raise RuntimeError("a scan worker exited unexpectedly")
+                    continue
+                if message[0] == "done":
+                    running -= 1
+                    self.retry_policy.retries += message[2]
+                elif message[0] == "fed":
+                    fed = True
+                else:
+                    yield unpack_result(message, self.sites)
+            if self.feed_error:
+                raise self.feed_error
+        finally:
+            # Left early, so the workers' remaining probes are not wanted
+            self.stopped = bool(running)
+            stop.set()
+
+    def close(self):
+        for process in self.processes:
+            process.join(timeout=0 if self.stopped else 5)
+            if process.is_alive():
+                process.terminate()
+
+class LazyEngine:
+    """
+    Builds an engine only once a job needs probing, so a scan answered entirely
+    from the cache or a journal never imports an HTTP client or starts workers.
+    """
+    def __init__(self, factory):
+        self.factory = factory
+        self.engine = None
+        self.idle_policy = RetryPolicy()
+
+    @property
+    def retry_policy(self):
+        return self.engine.retry_policy if self.engine else self.idle_policy
+
+    def scan(self, jobs, deadline=None):
+        """
+        Passes known results through until the first job to probe, then hands that
+        job and the rest to the engine, building it if needed.
+
+        Args:
+            jobs (iterable): (username, site) pairs to probe, or known ProbeResults.
+            deadline (Deadline): Optional deadline for the whole scan.
+
+        Yields:
+            ProbeResult: The result of each job.
+        """
+        jobs = iter(jobs)
+        for job in jobs:
+            if isinstance(job, ProbeResult):
+                yield job
+                continue
+            if self.engine is None:
+                self.engine = self.factory()
+            yield from self.engine.scan(itertools.chain([job], jobs), deadline)
+            return
+
+    def close(self):
+        if self.engine:
+            self.engine.close()
+
+def read_usernames(path):
+    """
+    Lazily reads usernames from a file, one per line.
+
+    Blank lines and lines starting with '#' are skipped, as are repeats of a
+    username already read.
+
+    Args:
+        path (str): The file to read, or "-" for standard input.
+
+    Yields:
+        str: Each username in file order.
+    """
+    seen = set()
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line in f:
+            username = line.strip()
+            if not username or username.startswith("#") or username in seen:
+                continue
+            seen.add(username)
+            yield username
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def skip_usernames(jobs, usernames):
+    """
+    Drops the jobs of usernames that need no more probes.
+
+    Args:
+        jobs (iterable): (username, site) pairs or known ProbeResults.
+        usernames (set): Usernames to skip; it may grow while jobs are consumed.
+
+    Yields:
+        tuple or ProbeResult: The jobs of every other username.
+    """
+    for job in jobs:
+        username = job.username if isinstance(job, ProbeResult) else job[0]
+        if username not in usernames:
+            yield job
+
+VARIANT_SEPARATORS = (".", "_", "-")
+
+def username_variants(username, suffixes=0):
+    """
+    Yields a username and the variants people commonly register instead: other
+    casings, its separators swapped for each other or dropped, and numeric suffixes.
+
+    Args:
+        username (str): The username to vary.
+        suffixes (int): Also try the name followed by 1 to `suffixes`.
+
+    Yields:
+        str: The username first, then each distinct variant.
+    """
+    forms = [username]
+    if any(separator in username for separator in VARIANT_SEPARATORS):
+        for target in VARIANT_SEPARATORS + ("",):
+            forms.append(re.sub("[._-]", target, username))
+    seen = set()
+    for form in forms:
+        for candidate in (form, form.lower(), form.capitalize(), form.upper()):
+            if candidate and candidate not in seen:
+                seen.add(candidate)
+                yield candidate
+    for number in range(1, suffixes + 1):
+        for form in dict.fromkeys(form.lower() for form in forms):
+            if form:
+                yield f"{form}{number}"
+
+def expand_variants(usernames, suffixes=0):
+    """
+    Replaces every username with itself followed by its variants.
+
+    Args:
+        usernames (iterable): The usernames to expand.
+        suffixes (int): Numeric suffixes to try, as in username_variants().
+
+    Yields:
+        str: The usernames and their variants.
+    """
+    for username in usernames:
+        yield from username_variants(username, suffixes)
+
+class RequestDeduplicator:
+    """
+    Makes each distinct request once and fans its result out to every job that maps
+    to it: catalogue entries that share a URL template and rules and so render the
+    same URL, and, with `fold_case`, username variants that differ only in case on
+    a site marked case-insensitive.
+
+    Jobs pass through dedupe() before the engine and results through fan_out()
+    after it. A duplicate of a request still in flight waits for its result; one
+    of a request already finished is answered at once. Finished results are kept
+    for the `keep` most recent requests, after which a repeat is simply probed again.
+    """
+    def __init__(self, keep=10000, fold_case=False):
+        self.keep = keep
+        self.fold_case = fold_case
+        self.waiting = {}
+        self.finished = collections.OrderedDict()
+        self.shared = 0
+        self.lock = threading.Lock()
+
+    def dedupe(self, jobs):
+        """
+        Drops jobs whose request is already being made.
+
+        Args:
+            jobs (iterable): (username, site) pairs or known ProbeResults.
+
+        Yields:
+            tuple or ProbeResult: The first job for each request, or a shared result.
+        """
+        for job in jobs:
+            if isinstance(job, ProbeResult):
+                yield job
+                continue
+            username, site = job
+            key = site.fetch_key(username, self.fold_case)
+            with self.lock:
+                finished = self.finished.get(key)
+                if finished is None:
+                    if key in self.waiting:
+                        self.waiting[key].append(job)
+                        self.shared += 1
+                        continue
+                    self.waiting[key] = []
+                else:
+                    self.shared += 1
+            yield finished.retarget(username, site) if finished else job
+
+    def fan_out(self, results):
+        """
+        Passes results through, followed by a copy for every job that shared the request.
+
+        Args:
+            results (iterable): ProbeResults from the engine.
+
+        Yields:
+            ProbeResult: Every result, including the shared copies.
+        """
+        for result in results:
+            yield result
+            key = result.site.fetch_key(result.username, self.fold_case)
+            with self.lock:
+                followers = self.waiting.pop(key, None)
+                if followers is None:
+                    # Not a request made here: a cache hit or an already shared copy
+                    continue
+                self.finished[key] = result
+                if len(self.finished) > self.keep:
+                    self.finished.popitem(last=False)
+            for username, site in followers:
+                yield result.retarget(username, site)
+
+def iter_jobs(usernames, sites):
+    """
+    Expands usernames into the (username, site) pairs fed to a scan engine.
+
+    Args:
+        usernames (iterable): The usernames to search for.
+        sites (list): The compiled SiteRule objects to check.
+
+    Yields:
+        tuple: A (username, site) pair for every site of every username.
+    """
+    for username in usernames:
+        for site in sites:
+            yield username, site
+
+class ResultCache:
+    """
+    Stores probe verdicts in SQLite so repeat scans can skip known (username, site) pairs.
+
+    Entries are keyed by the lower-cased username, the site name and the rendered
+    URL. Found and not-found verdicts expire after separate TTLs; errors are never
+    cached. The cache also keeps a moving average of each site's network time, which
+    order_by_latency() uses to decide which sites to start first.
+    """
+    def __init__(self, path, positive_ttl=86400, negative_ttl=21600):
+        self.path = path
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.lock = threading.Lock()
+        import sqlite3
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "username TEXT NOT NULL, site TEXT NOT NULL, url TEXT NOT NULL, "
+            "status TEXT NOT NULL, http_status INTEGER, profile TEXT, checked_at REAL NOT NULL, "
+            "PRIMARY KEY (username, site, url))"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS latency (site TEXT PRIMARY KEY, mean REAL NOT NULL)")
+        self.conn.commit()
+        self.latencies = dict(self.conn.execute("SELECT site, mean FROM latency"))
+
+    @staticmethod
+    def key(username, site):
+        return username.strip().lower(), site.name, site.url.format(username)
+
+    def lookup(self, username, site):
+        """
+        Returns the cached result for a pair if it has not expired.
+
+        Args:
+            username (str): The username.
+            site (SiteRule): The compiled site.
+
+        Returns:
+            ProbeResult: The cached result, or None on a miss.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, http_status, profile, checked_at FROM results WHERE username = ? AND site = ? AND url = ?",
+                self.key(username, site),
+            ).fetchone()
+        if row:
+            status, http_status, profile, checked_at = row
+            ttl = self.positive_ttl if status == FOUND else self.negative_ttl
+            if time.time() - checked_at < ttl:
+                self.hits += 1
+                profile = UserProfile(**json.loads(profile)) if profile else None
+                return ProbeResult(username, site, profile, status, 0, http_status, cached=True)
+        self.misses += 1
+        return None
+
+    def store(self, result):
+        """
+        Records a fresh found or not-found verdict, and the probe's network time in its
+        site's latency average.
+
+        Args:
+            result (ProbeResult): The result to store.
+        """
+        if result.cached:
+            return
+        if result.metrics:
+            # Time spent waiting on the network only: pacing sleeps and retry backoff
+            # depend on the rest of the scan, not on how fast the site answers
+            sample = result.metrics.first_byte + result.metrics.transfer
+            with self.lock:
+                mean = self.latencies.get(result.site.name)
+                self.latencies[result.site.name] = sample if mean is None else mean + LATENCY_WEIGHT * (sample - mean)
+        if result.status not in (FOUND, NOT_FOUND):
+            return
+        profile = json.dumps(result.profile.to_dict()) if result.profile else None
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self.key(result.username, result.site) + (result.status, result.http_status, profile, time.time()),
+            )
+            self.writes += 1
+            if self.writes % 100 == 0:
+                self.commit()
+
+    def commit(self):
+        self.conn.executemany("INSERT OR REPLACE INTO latency VALUES (?, ?)", self.latencies.items())
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.commit()
+            self.conn.close()
+
+def order_by_latency(sites, latencies, fastest_first=False):
+    """
+    Orders sites by their average network time in earlier runs.
+
+    A full scan starts the slow sites first, so the fast ones finish in the gaps
+    while the slow ones are still waiting on the network instead of a slow
+    straggler holding up the end. A scan that may stop early, on a deadline or
+    after enough hits, wants answers soon and starts the fast sites first. Sites
+    with no history are placed as if they took the average time.
+
+    Args:
+        sites (list): The compiled SiteRule objects.
+        latencies (dict): Average seconds per probe, by site name.
+        fastest_first (bool): Start the fastest sites first instead of the slowest.
+
+    Returns:
+        list: The sites in the order to probe them.
+    """
+    if not latencies:
+        return sites
+    average = sum(latencies.values()) / len(latencies)
+    return sorted(sites, key=lambda site: latencies.get(site.name, average), reverse=not fastest_first)
+
+def resolve_cached(jobs, cache, refresh=False):
+    """
+    Replaces jobs that have a fresh cached verdict with that verdict.
+
+    Args:
+        jobs (iterable): (username, site) pairs.
+        cache (ResultCache): The cache to consult.
+        refresh (bool): Ignore cached verdicts and probe everything again.
+
+    Yields:
+        tuple or ProbeResult: The pair to probe, or its cached result.
+    """
+    for job in jobs:
+        if isinstance(job, ProbeResult):
+            yield job
+            continue
+        username, site = job
+        if refresh:
+            cache.misses += 1
+            yield username, site
+            continue
+        yield cache.lookup(username, site) or (username, site)
+
+class ScanJournal:
+    """
+    An append-only log of finished probes that lets an interrupted scan pick up where
+    it stopped.
+
+    Every result is appended as one JSON line and flushed straight away, so a killed
+    process loses nothing already written; the file is also fsynced every
+    sync_every records or sync_interval seconds, bounding what a host crash can lose.
+    A line torn by a crash mid-write is skipped when the journal is loaded. Found and
+    not-found verdicts count as done on resume; errors are probed again.
+
+    Only a resumed journal's verdicts are held in memory, with the profile kept for
+    found ones alone; results recorded by this run are written out and forgotten.
+    """
+    def __init__(self, path, resume=False, sync_every=100, sync_interval=1.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.done = {}
+        self.torn = 0
+        self.skipped = 0
+        self.writes = 0
+        self.lock = threading.Lock()
+        if resume:
+            self.load()
+        self.file = open(path, "ab")
+        if self.file.tell() and not self.ends_with_newline():
+            # Start a fresh line after a torn tail instead of appending to it
+            self.file.write(b"\n")
+        self.synced_at = time.monotonic()
+
+    def ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def key(username, site):
+        return username, site.name, site.url.format(username)
+
+    def load(self):
+        """
+        Reads the finished verdicts from the journal being resumed.
+
+        Raises:
+            OSError: If the journal cannot be read, including when it does not exist.
+        """
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    self.torn += 1
+                    continue
+                status = record.get("status")
+                if status in (FOUND, NOT_FOUND):
+                    profile = record["profile"] if status == FOUND else None
+                    self.done[(record["username"], record["site"], record["url"])] = (status, record["http_status"], record["attempts"], profile)
+
+    def lookup(self, username, site):
+        """
+        Returns the journaled result for a pair that already finished.
+
+        Args:
+            username (str): The username.
+            site (SiteRule): The compiled site.
+
+        Returns:
+            ProbeResult: The earlier result, or None if the pair still needs probing.
+        """
+        with self.lock:
+            verdict = self.done.get(self.key(username, site))
+        if verdict is None:
+            return None
+        self.skipped += 1
+        status, http_status, attempts, profile = verdict
+        profile = UserProfile(**profile) if profile else None
+        return ProbeResult(username, site, profile, status, attempts, http_status, cached=True)
+
+    def record(self, result):
+        """
+        Appends a result unless it was resumed from the journal.
+
+        Args:
+            result (ProbeResult): The result to record.
+        """
+        key = self.key(result.username, result.site)
+        record = {
+            "username": key[0], "site": key[1], "url": key[2],
+            "status": result.status, "http_status": result.http_status, "attempts": result.attempts,
+            "error": result.error, "profile": result.profile.to_dict() if result.profile else None,
+            "checked_at": time.time(),
+        }
+        with self.lock:
+            if key in self.done:
+                return
+            self.file.write(json.dumps(record).encode("utf-8") + b"\n")
+            self.file.flush()
+            self.writes += 1
+            if self.writes % self.sync_every == 0 or time.monotonic() - self.synced_at >= self.sync_interval:
+                os.fsync(self.file.fileno())
+                self.synced_at = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+
+def resolve_journaled(jobs, journal):
+    """
+    Replaces jobs that finished in an earlier run of the job with their journaled result.
+
+    Args:
+        jobs (iterable): (username, site) pairs.
+        journal (ScanJournal): The journal being resumed.
+
+    Yields:
+        tuple or ProbeResult: The pair to probe, or its earlier result.
+    """
+    for username, site in jobs:
+        yield journal.lookup(username, site) or (username, site)
+
+class RunMetrics:
+    """
+    Aggregates per-probe metrics into per-site and whole-run figures.
+    """
+    def __init__(self):
+        self.sites = {}
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.total = 0.0
+        self.probes = 0
+
+    def add(self, result):
+        """
+        Folds one probe's metrics into the run totals. Cached results are skipped.
+
+        Args:
+            result (ProbeResult): The result to add.
+        """
+        metrics = result.metrics
+        if metrics is None:
+            return
+        site = self.sites.setdefault(result.site.name, {"probes": 0, "errors": 0, "total": 0.0, "max": 0.0, "bytes_read": 0, "outcomes": {}})
+        site["probes"] += 1
+        site["errors"] += result.status == ERROR
+        site["total"] += metrics.total
+        site["max"] = max(site["max"], metrics.total)
+        site["bytes_read"] += metrics.bytes_read
+        site["outcomes"][metrics.outcome] = site["outcomes"].get(metrics.outcome, 0) + 1
+        for phase in PHASES:
+            self.phases[phase] += getattr(metrics, phase)
+        self.total += metrics.total
+        self.probes += 1
+
+    def breakdown(self):
+        """
+        Splits the summed probe time into network, parsing and waiting.
+
+        Returns:
+            dict: Seconds spent in each of "network", "parse" and "wait".
+        """
+        return {
+            "network": self.phases["first_byte"] + self.phases["transfer"],
+            "parse": self.phases["parse"],
+            "wait": self.phases["wait"],
+        }
+
+    def to_dict(self):
+        return {"probes": self.probes, "total": self.total, "phases": self.phases, "breakdown": self.breakdown(), "sites": self.sites}
+
+    def to_prometheus(self):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        def label(value):
+            return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+        lines = [
+            "# HELP userscope_probes_total Probes run, by site and outcome.",
+            "# TYPE userscope_probes_total counter",
+        ]
+        for name, site in sorted(self.sites.items()):
+            for outcome, count in sorted(site["outcomes"].items()):
+                lines.append(f'userscope_probes_total{{site="{label(name)}",outcome="{label(outcome)}"}} {count}')
+        lines += ["# HELP userscope_probe_seconds Probe wall time, by site.", "# TYPE userscope_probe_seconds summary"]
+        for name, site in sorted(self.sites.items()):
+            lines.append(f'userscope_probe_seconds_sum{{site="{label(name)}"}} {site["total"]:.6f}')
+            lines.append(f'userscope_probe_seconds_count{{site="{label(name)}"}} {site["probes"]}')
+        lines += ["# HELP userscope_bytes_read_total Response body bytes read, by site.", "# TYPE userscope_bytes_read_total counter"]
+        for name, site in sorted(self.sites.items()):
+            lines.append(f'userscope_bytes_read_total{{site="{label(name)}"}} {site["bytes_read"]}')
+        lines += ["# HELP userscope_phase_seconds_total Probe time spent in each phase.", "# TYPE userscope_phase_seconds_total counter"]
+        for phase, seconds in self.phases.items():
+            lines.append(f'userscope_phase_seconds_total{{phase="{phase}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """
+        Writes the metrics to a file, as Prometheus text for .prom/.txt paths and
+        JSON otherwise.
+
+        Args:
+            path (str): The file to write.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith((".prom", ".txt")):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=4)
+
+    def print_summary(self, top=5, quiet=False):
+        """
+        Prints the slowest sites, the sites with the most errors and where the time went.
+
+        Args:
+            top (int): How many sites to list in each ranking.
+            quiet (bool): Print to stderr without colour, as in quiet mode.
+        """
+        if not self.probes:
+            return
+        report(Fore.BLUE, f"[+] Run metrics: {self.probes} probes, {self.total:.1f} s of probe time", quiet)
+        slowest = sorted(self.sites.items(), key=lambda item: item[1]["total"] / item[1]["probes"], reverse=True)[:top]
+        report(Fore.YELLOW, "    [+] Slowest sites (mean / max):", quiet)
+        for name, site in slowest:
+            report(Fore.YELLOW, f"        {name}: {site['total'] / site['probes']:.2f} s / {site['max']:.2f} s", quiet)
+        failing = sorted((item for item in self.sites.items() if item[1]["errors"]), key=lambda item: item[1]["errors"] / item[1]["probes"], reverse=True)[:top]
+        if failing:
+            report(Fore.YELLOW, "    [+] Highest error rates:", quiet)
+            for name, site in failing:
+                outcomes = ", ".join(f"{outcome} {count}" for outcome, count in site["outcomes"].items() if outcome not in (FOUND, NOT_FOUND))
+                report(Fore.YELLOW, f"        {name}: {site['errors'] / site['probes']:.0%} ({outcomes})", quiet)
+        breakdown = self.breakdown()
+        spent = sum(breakdown.values()) or 1.0
+        report(Fore.YELLOW, "    [+] Time breakdown: " + ", ".join(f"{key} {seconds:.1f} s ({seconds / spent:.0%})" for key, seconds in breakdown.items()), quiet)
+
+class JsonResultWriter:
+    """
+    Collects results and writes them as one indented JSON array when closed.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.results = []
+
+    def write(self, record):
+        self.results.append(record)
+
+    def close(self):
+        with open(self.path, "w") as f:
+            json.dump(self.results, f, indent=4)
+
+class NdjsonResultWriter:
+    """
+    Writes one JSON object per line as results arrive, flushing after each line so
+    the file can be tailed live and survives an interrupted run.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+RESULT_WRITERS = {
+    "json": JsonResultWriter,
+    "ndjson": NdjsonResultWriter,
+}
+
+def output_format_for(path, output_format=None):
+    """
+    Picks the output format, falling back to the file extension.
+
+    Args:
+        path (str): The output file path.
+        output_format (str): An explicit "json" or "ndjson", if given.
+
+    Returns:
+        str: The output format to use.
+    """
+    if output_format:
+        return output_format
+    if path.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "json"
+
+class ScanRun:
+    """
+    One pass of a set of usernames over the sites on an engine, used by both the
+    CLI and the service.
+
+    Iterating it builds the job stream (journal and cache lookups, early-stop
+    filtering and request deduplication), runs it on the engine, records every
+    result in the journal and cache, and yields the results. The counters are
+    filled in as it goes. The deadline starts when the run is created, and cancel()
+    cuts the run short from another thread. `fold_case` is set when the usernames include generated
+    variants, so case variants on case-insensitive sites share one request.
+    """
+    def __init__(self, scanner, usernames, sites, cache=None, refresh=False, journal=None, deadline=None, first_n=None, stop_on=None, batch=True, fold_case=False):
+        self.scanner = scanner
+        self.usernames = usernames
+        self.sites = sites
+        self.cache = cache
+        self.refresh = refresh
+        self.journal = journal
+        self.deadline = Deadline(deadline)
+        self.first_n = first_n
+        self.stop_on = stop_on
+        self.batch = batch
+        self.deduplicator = RequestDeduplicator(fold_case=fold_case)
+        self.satisfied = set()
+        self.timed_out = 0
+
+    def __iter__(self):
+        if self.cache:
+            early_stop = self.deadline.at is not None or self.first_n or self.stop_on
+            sites = order_by_latency(self.sites, self.cache.latencies, fastest_first=bool(early_stop))
+        else:
+            sites = self.sites
+        jobs = iter_jobs(self.usernames, sites)
+        if self.journal:
+            jobs = resolve_journaled(jobs, self.journal)
+        if self.cache:
+            jobs = resolve_cached(jobs, self.cache, self.refresh)
+        if self.first_n or self.stop_on:
+            jobs = skip_usernames(jobs, self.satisfied)
+        jobs = self.deduplicator.dedupe(jobs)
+        hits = {}
+        scan = self.scanner.scan(jobs, self.deadline)
+        results = self.deduplicator.fan_out(scan)
+        try:
+            for result in results:
+                self.timed_out += result.status == TIMED_OUT
+                if self.journal:
+                    self.journal.record(result)
+                if self.cache:
+                    self.cache.store(result)
+                yield result
+                if result.found:
+                    hits[result.username] = hits.get(result.username, 0) + 1
+                    if (self.first_n and hits[result.username] >= self.first_n) or (self.stop_on and result.site.name.lower() in self.stop_on):
+                        self.satisfied.add(result.username)
+                        # With one username there is nothing left to check
+                        if not self.batch:
+                            return
+        finally:
+            results.close()
+            scan.close()
+
+    def cancel(self):
+        """
+        Ends the run early: probes stop after their current attempt and everything
+        not yet checked is reported as timed out.
+        """
+        self.deadline.cancel()
+
+def report(color, message, quiet=False):
+    """
+    Prints a status or error line: coloured on stdout, or plain on stderr in quiet
+    mode so stdout carries nothing but found URLs.
+
+    Args:
+        color (str): The colorama colour for normal mode.
+        message (str): The line to print.
+        quiet (bool): Whether the run is in quiet mode.
+    """
+    if quiet:
+        print(message, file=sys.stderr)
+    else:
+        print(color + message + Style.RESET_ALL)
+
+def print_banner():
+    import pyfiglet
+    ascii_banner = pyfiglet.figlet_format("UserScope")
+    print(Fore.RED + ascii_banner + Style.RESET_ALL)
+
+def print_profile(profile, show_username=False):
+    """
+    Prints a found profile and any extracted details.
+
+    Args:
+        profile (UserProfile): The profile to print.
+        show_username (bool): Whether to name the username, for batch scans.
+    """
+    label = profile.username if show_username else "Username"
+    print(Fore.GREEN + f"[+] {label} found on {profile.site_name}: {profile.url}" + Style.RESET_ALL)
+    if profile.followers:
+        print(Fore.GREEN + f"    [+] Followers: {profile.followers}" + Style.RESET_ALL)
+    if profile.following:
+        print(Fore.GREEN + f"    [+] Following: {profile.following}" + Style.RESET_ALL)
+    if profile.followers and profile.following:
+        print(" " + Style.RESET_ALL)
+    if profile.bio:
+        print(Fore.GREEN + f"    [+] Bio: {profile.bio}" + Style.RESET_ALL)
+    if profile.pfp_url:
+        print(Fore.GREEN + f"    [+] Profile Picture URL: {profile.pfp_url}" + Style.RESET_ALL)
+    if profile.additional_info:
+        for key, value in profile.additional_info.items():
+             print(Fore.GREEN + f"    [+] {key}: {value}" + Style.RESET_ALL)
+
+def sherlock(username, sites, threads=10, timeout=10, output=None, max_retries=3, engine="thread", concurrency=100, limit_per_host=10, output_format=None, host_rate=2.0, host_burst=2, retry_budget=None, retry_backoff=0.5, max_body=DEFAULT_MAX_BODY, cache=None, refresh=False, stats=False, metrics_path=None, workers=1, journal=None, banner=True, quiet=False, deadline=None, first_n=None, stop_on=None, fold_case=False):
+    """
+    Searches for one or more usernames on multiple social media platforms and prints the
+    found links, followers, following, and bio.
+
+    Every (username, site) pair runs through a single engine, so a batch shares one
+    worker pool and one connection pool for the whole run. Pairs that would fetch
+    the same URL with the same rules are probed once and share the result.
+
+    Args:
+        username (str or iterable): The username to search for, or an iterable of usernames.
+        sites (list): The compiled SiteRule objects to check.
+        threads (int): The number of threads to use for concurrent requests.
+        timeout (int): Timeout for each request in seconds.
+        output (str): The file path to save the results to.
+        max_retries (int): Maximum number of attempts for transient failures.
+        engine (str): The scan engine to use, "thread" or "async".
+        concurrency (int): Total connection limit for the async engine.
+        limit_per_host (int): Per-host connection limit for the async engine.
+        output_format (str): "json" for one array written at the end, or "ndjson" to
+            stream one line per profile as it is found. Defaults by file extension.
+        host_rate (float): Requests per second allowed per host, 0 for no pacing.
+        host_burst (int): Requests a host may receive back to back before pacing applies.
+        retry_budget (int): Total retries allowed across the run, None for unlimited.
+        retry_backoff (float): Base delay in seconds for exponential retry backoff.
+        max_body (int): The most body bytes to read per response.
+        cache (ResultCache): Optional cache of earlier verdicts to reuse and update.
+        refresh (bool): Probe every pair again even if the cache has a verdict.
+        stats (bool): Print a metrics summary at the end of the run.
+        metrics_path (str): File to dump the run metrics to (JSON, or Prometheus text for .prom/.txt).
+        workers (int): Worker processes to shard the scan across; 1 scans in this process.
+        journal (ScanJournal): Optional journal recording every result, and skipping
+            the pairs it already holds when a job is resumed.
+        banner (bool): Print the ASCII art banner.
+        quiet (bool): Machine mode: print only the URL of each found profile, one per
+            line, with no banner, progress or summary lines. Errors are still printed.
+        deadline (float): Seconds the whole scan may take; probes still running then
+            are cancelled and reported as timed out.
+        first_n (int): Stop checking a username once it has been found this many times.
+        stop_on (set): Lower-cased site names; stop checking a username once it is
+            found on any of them.
+        fold_case (bool): The usernames include generated variants; probe spellings
+            that differ only in case once on sites marked case-insensitive.
+    """
+    batch = not isinstance(username, str)
+    usernames = username if batch else [username]
+
+    if banner and not quiet:
+        print_banner()
+
+    if not quiet:
+        print(Fore.BLUE + "[+] Starting Sherlock Username Search" + Style.RESET_ALL)
+        print(Fore.YELLOW + "[+] Please wait while we check for the username on different social media platforms!" + Style.RESET_ALL)
+
+    writer = None
+    if output:
+        output_format = output_format_for(output, output_format)
+        try:
+            writer = RESULT_WRITERS[output_format](output)
+        except Exception as e:
+            report(Fore.RED, f"[-] Error opening output file: {e}", quiet)
+            return
+
+    engine_options = {
+        "name": engine, "threads": threads, "timeout": timeout, "max_retries": max_retries,
+        "concurrency": concurrency, "limit_per_host": limit_per_host, "host_rate": host_rate, "host_burst": host_burst,
+        "retry_budget": retry_budget, "retry_backoff": retry_backoff, "max_body": max_body,
+    }
+    if workers > 1:
+        scanner = LazyEngine(functools.partial(ShardedEngine, workers, sites, by_site=not batch, **engine_options))
+    else:
+        scanner = LazyEngine(functools.partial(make_engine, **engine_options))
+    if journal and journal.done and not quiet:
+        print(Fore.YELLOW + f"[+] Resuming {journal.path}: {len(journal.done)} probes already finished" + Style.RESET_ALL)
+    run_metrics = RunMetrics()
+    run = ScanRun(scanner, usernames, sites, cache, refresh, journal, deadline, first_n, stop_on, batch, fold_case)
+    results = iter(run)
+    try:
+        for result in results:
+            run_metrics.add(result)
+            if result.found:
+                if writer:
+                    writer.write(result.to_dict())
+                if quiet:
+                    print(result.profile.url, flush=True)
+                else:
+                    print_profile(result.profile, show_username=batch)
+    except KeyboardInterrupt:
+        report(Fore.RED, "[-] Interrupted, keeping the results found so far", quiet)
+    except BrokenPipeError:
+        # Whatever read stdout has gone, as with `-q | head -1`: stop scanning and send
+        # the rest of stdout, including what Python flushes at exit, nowhere
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        results.close()
+        scanner.close()
+
+    if not quiet:
+        if run.deduplicator.shared:
+            print(Fore.YELLOW + f"[+] {run.deduplicator.shared} probes shared a request with another username variant or site entry" + Style.RESET_ALL)
+        if run.timed_out:
+            print(Fore.YELLOW + f"[+] Deadline reached: {run.timed_out} probes timed out" + Style.RESET_ALL)
+        if run.satisfied and batch:
+            print(Fore.YELLOW + f"[+] Enough hits found for {len(run.satisfied)} usernames, stopped checking them early" + Style.RESET_ALL)
+        elif run.satisfied:
+            print(Fore.YELLOW + "[+] Enough hits found, stopped early" + Style.RESET_ALL)
+
+    if stats:
+        run_metrics.print_summary(quiet=quiet)
+    if metrics_path:
+        try:
+            run_metrics.dump(metrics_path)
+            if not quiet:
+                print(Fore.GREEN + f"[+] Metrics saved to {metrics_path}" + Style.RESET_ALL)
+        except Exception as e:
+            report(Fore.RED, f"[-] Error saving metrics: {e}", quiet)
+
+    if cache and not quiet:
+        print(Fore.YELLOW + f"[+] Cache: {cache.hits} hits, {cache.misses} misses" + Style.RESET_ALL)
+
+    if journal and not quiet:
+        print(Fore.YELLOW + f"[+] Journal: {journal.skipped} probes resumed, {journal.writes} recorded to {journal.path}" + Style.RESET_ALL)
+
+    if scanner.retry_policy.retries and not quiet:
+        print(Fore.YELLOW + f"[+] Retried {scanner.retry_policy.retries} transient failures" + Style.RESET_ALL)
+
+    if writer:
+        try:
+            writer.close()
+            if not quiet:
+                print(Fore.GREEN + f"[+] Results saved to {output} in {output_format.upper()} format" + Style.RESET_ALL)
+        except Exception as e:
+            report(Fore.RED, f"[-] Error saving to file: {e}", quiet)
+
+    if not quiet:
+        print(Fore.BLUE + "[+] Completed, Thank you for using our tool!" + Style.RESET_ALL)
+
+class SharedScan:
+    """
+    A service scan whose results are replayed to every client that asked for it.
+
+    Results are kept for the life of the scan, so a client that joins late first
+    gets everything found so far and then follows along.
+    """
+    def __init__(self, key, username, deadline=None, first_n=None, stop_on=None):
+        self.key = key
+        self.username = username
+        self.deadline = deadline
+        self.first_n = first_n
+        self.stop_on = stop_on
+        self.results = []
+        self.done = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def publish(self, result):
+        with self.condition:
+            self.results.append(result)
+            self.condition.notify_all()
+
+    def finish(self, error=None):
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    def follow(self):
+        """
+        Yields every result of the scan, waiting for new ones until it finishes.
+
+        Yields:
+            ProbeResult: The results in the order they were published.
+        """
+        index = 0
+        while True:
+            with self.condition:
+                while index == len(self.results) and not self.done:
+                    self.condition.wait()
+                batch = self.results[index:]
+                finished = self.done
+            index += len(batch)
+            yield from batch
+            if finished and index == len(self.results):
+                return
+
+class ScanService:
+    """
+    Runs scans for the HTTP service on one long-lived engine, cache and site list.
+
+    A fixed pool of scan threads takes scans from a bounded queue. A request for a
+    scan that is already queued or running joins it instead of starting another;
+    when the queue is full, request() raises queue.Full so the caller can push back.
+    """
+    def __init__(self, scanner, sites, cache=None, max_scans=4, max_queued=16, deadline=None):
+        self.scanner = scanner
+        self.sites = sites
+        self.cache = cache
+        self.deadline = deadline
+        self.scans = {}
+        self.queue = queue.Queue(max_queued)
+        self.active = 0
+        self.started = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.runs = set()
+        self.threads = [threading.Thread(target=self._work, name=f"userscope-scan-{i}", daemon=True) for i in range(max_scans)]
+        for thread in self.threads:
+            thread.start()
+
+    def request(self, username, deadline=None, first_n=None, stop_on=None):
+        """
+        Returns the scan for a username, joining an identical one already in progress.
+
+        Args:
+            username (str): The username to search for.
+            deadline (float): Seconds the scan may take, or None for the service default.
+            first_n (int): Stop once the username has been found this many times.
+            stop_on (set): Lower-cased site names to stop on.
+
+        Returns:
+            tuple: The SharedScan and whether it was joined rather than started.
+
+        Raises:
+            queue.Full: If the scan would have to wait and the queue is full.
+        """
+        deadline = deadline if deadline is not None else self.deadline
+        key = (username, deadline, first_n, frozenset(stop_on or ()))
+        with self.lock:
+            scan = self.scans.get(key)
+            if scan:
+                self.coalesced += 1
+                return scan, True
+            scan = SharedScan(key, username, deadline, first_n, stop_on)
+            try:
+                self.queue.put_nowait(scan)
+            except queue.Full:
+                self.rejected += 1
+                raise
+            self.scans[key] = scan
+            self.started += 1
+            return scan, False
+
+    def _work(self):
+        while not self.stopping.is_set():
+            try:
+                scan = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            run = ScanRun(self.scanner, [scan.username], self.sites, self.cache, deadline=scan.deadline, first_n=scan.first_n, stop_on=scan.stop_on, batch=False)
+            with self.lock:
+                self.active += 1
+                self.runs.add(run)
+            # close() cancels the runs it can see; one registered after that is cancelled here
+            if self.stopping.is_set():
+                run.cancel()
+            error = None
+            try:
+                for result in run:
+                    scan.publish(result)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                with self.lock:
+                    self.active -= 1
+                    self.runs.discard(run)
+                    self.scans.pop(scan.key, None)
+                scan.finish(error)
+
+    def status(self):
+        """
+        Returns the service's counters for the health endpoint.
+        """
+        with self.lock:
+            status = {
+                "status": "ok",
+                "sites": len(self.sites),
+                "active": self.active,
+                "queued": self.queue.qsize(),
+                "queue_size": self.queue.maxsize,
+                "started": self.started,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "retries": self.scanner.retry_policy.retries,
+            }
+        if self.cache:
+            status["cache"] = {"hits": self.cache.hits, "misses": self.cache.misses}
+        return status
+
+    def close(self):
+        """
+        Stops taking scans, fails the queued ones and cancels the running ones,
+        waiting up to a few seconds in all for their current requests to end.
+        """
+        self.stopping.set()
+        while True:
+            try:
+                scan = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            with self.lock:
+                self.scans.pop(scan.key, None)
+            scan.finish("the service is shutting down")
+        with self.lock:
+            for run in self.runs:
+                run.cancel()
+        end = time.monotonic() + 5
+        for thread in self.threads:
+            thread.join(timeout=max(0.0, end - time.monotonic()))
+
+@functools.lru_cache(maxsize=None)
+def service_handler_class():
+    """
+    Builds the request handler for the HTTP service. Defined on first use so
+    http.server is only imported when the service runs.
+
+    Returns:
+        type: The ScanRequestHandler class.
+    """
+    import http.server
+    from urllib.parse import parse_qs
+
+    class ScanRequestHandler(http.server.BaseHTTPRequestHandler):
+        """
+        Serves GET /scan?username=NAME and GET /health.
+
+        Scan results stream as chunked NDJSON, one result per line and a final
+        {"event": "done"} line, or as server-sent events when asked for with
+        format=sse or an Accept: text/event-stream header.
+        """
+        protocol_version = "HTTP/1.1"
+        server_version = "UserScope"
+
+        def log_message(self, format, *args):
+            if not self.server.quiet:
+                super().log_message(format, *args)
+
+        def send_json(self, status, data, headers=None):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if url.path == "/health":
+                return self.send_json(200, self.server.service.status())
+            if url.path != "/scan":
+                return self.send_json(404, {"error": "not found"})
+
+            username = params.get("username", "").strip()
+            if not username:
+                return self.send_json(400, {"error": "username is required"})
+            try:
+                deadline = parse_deadline(params["deadline"]) if "deadline" in params else None
+            except argparse.ArgumentTypeError as e:
+                return self.send_json(400, {"error": str(e)})
+            try:
+                first_n = int(params["first_n"]) if "first_n" in params else None
+            except ValueError:
+                return self.send_json(400, {"error": "first_n must be a number"})
+            stop_on = {name.strip().lower() for name in params.get("stop_on", "").split(",") if name.strip()} or None
+            sse = params.get("format") == "sse" or "text/event-stream" in self.headers.get("Accept", "")
+
+            try:
+                scan, joined = self.server.service.request(username, deadline, first_n, stop_on)
+            except queue.Full:
+                return self.send_json(503, {"error": "too many scans queued, retry later"}, {"Retry-After": str(SERVICE_RETRY_AFTER)})
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream" if sse else "application/x-ndjson")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("X-UserScope-Coalesced", "true" if joined else "false")
+            self.end_headers()
+            probes = found = 0
+            try:
+                for result in scan.follow():
+                    probes += 1
+                    found += result.found
+                    data = json.dumps(result.to_dict())
+                    self.write_chunk((f"event: result\ndata: {data}\n\n" if sse else data + "\n").encode("utf-8"))
+                summary = {"event": "done", "username": username, "probes": probes, "found": found, "coalesced": joined}
+                if scan.error:
+                    summary["error"] = scan.error
+                data = json.dumps(summary)
+                self.write_chunk((f"event: done\ndata: {data}\n\n" if sse else data + "\n").encode("utf-8"))
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # The client went away; the scan carries on for anyone else following it
+                self.close_connection = True
+
+    return ScanRequestHandler
+
+def serve(address, service, quiet=False):
+    """
+    Runs the HTTP/JSON service until interrupted.
+
+    Args:
+        address (tuple): The (host, port) to listen on.
+        service (ScanService): The service answering scan requests.
+        quiet (bool): Don't log requests.
+    """
+    import http.server
+    server = http.server.ThreadingHTTPServer(address, service_handler_class())
+    server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    host, port = server.server_address[:2]
+    if not quiet:
+        print(Fore.GREEN + f"[+] Serving on http://{host}:{port} (GET /scan?username=NAME, GET /health)" + Style.RESET_ALL)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        if not quiet:
+            print(Fore.YELLOW + "[+] Shutting down" + Style.RESET_ALL)
+    finally:
+        server.server_close()
+
+def parse_address(value):
+    """
+    Parses a --serve address: a port, or host:port.
+
+    Args:
+        value (str): The address.
+
+    Returns:
+        tuple: The (host, port) to bind, on 127.0.0.1 unless a host is given.
+
+    Raises:
+        argparse.ArgumentTypeError: If the address is malformed.
+    """
+    host, _, port = value.rpartition(":")
+    try:
+        return host.strip("[]") or "127.0.0.1", int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid address '{value}', expected PORT or HOST:PORT")
+
+def parse_deadline(value):
+    """
+    Parses a scan deadline.
+
+    Args:
+        value (str): Seconds the scan may take.
+
+    Returns:
+        float: The deadline in seconds.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive, finite number.
+    """
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = None
+    # Also rejects nan, which fails every comparison
+    if seconds is None or not 0 < seconds < float("inf"):
+        raise argparse.ArgumentTypeError(f"invalid deadline '{value}', expected a positive number of seconds")
+    return seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Sherlock: Hunt down social media accounts by username")
+    parser.add_argument("username", nargs="?", help="The username to search for")
+    parser.add_argument("-U", "--usernames-file", help="File with one username per line to scan in a single run ('-' reads standard input)")
+    parser.add_argument("-t", "--threads", type=int, default=10, help="Number of threads to use (default: 10)")
+    parser.add_argument("--timeout", type=int, default=10, help="Timeout for requests in seconds (default: 10)")
+    parser.add_argument("-o", "--output", help="Output file to save results (JSON format)")
+    parser.add_argument("--format", dest="output_format", choices=["json", "ndjson"], help="Output format: a JSON array written at the end, or NDJSON streamed line by line (default: from the file extension, otherwise json)")
+    parser.add_argument("-r", "--retry", type=int, default=3, help="Maximum number of attempts for timeouts, connection errors, 429 and 5xx responses (default: 3)")
+    parser.add_argument("--retry-budget", type=int, help="Total retries allowed across the whole run (default: unlimited)")
+    parser.add_argument("--retry-backoff", type=float, default=0.5, help="Base delay in seconds for exponential backoff between retries (default: 0.5)")
+    parser.add_argument("-f", "--file", type=str, help="File containing a list of sites to check (JSON format)")
+    parser.add_argument("-e", "--engine", choices=["thread", "async"], default="thread", help="Scan engine to use (default: thread)")
+    parser.add_argument("-c", "--concurrency", type=int, default=100, help="Maximum concurrent connections for the async engine (default: 100)")
+    parser.add_argument("--limit-per-host", type=int, default=10, help="Maximum concurrent connections per host for the async engine (default: 10)")
+    parser.add_argument("--stats", action="store_true", help="Print slowest sites, error rates and a network/parse time breakdown at the end")
+    parser.add_argument("--metrics", help="Dump per-site run metrics to a file (Prometheus text for .prom/.txt, JSON otherwise)")
+    parser.add_argument("--cache", help="SQLite file caching verdicts between runs; fresh entries are reused instead of probed")
+    parser.add_argument("--refresh", action="store_true", help="Probe everything again and update the cache")
+    parser.add_argument("--cache-ttl", type=float, default=86400, help="Seconds a cached 'found' verdict stays fresh (default: 86400)")
+    parser.add_argument("--cache-negative-ttl", type=float, default=21600, help="Seconds a cached 'not found' verdict stays fresh (default: 21600)")
+    parser.add_argument("--journal", help="Append every finished probe to this file so the job can be resumed after a crash")
+    parser.add_argument("--resume", metavar="JOURNAL", help="Resume the job recorded in this journal, skipping finished probes; run with the same usernames and sites")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Worker processes to shard the scan across, by username in batch mode or by site otherwise (default: 1)")
+    parser.add_argument("--host-rate", type=float, default=2.0, help="Requests per second allowed per host, 0 to disable pacing (default: 2)")
+    parser.add_argument("--max-body", type=int, default=DEFAULT_MAX_BODY, help=f"Most bytes of a response body to read; reading also stops as soon as the site's rules are satisfied (default: {DEFAULT_MAX_BODY})")
+    parser.add_argument("--host-burst", type=int, default=2, help="Requests a host may receive back to back before pacing applies (default: 2)")
+    parser.add_argument("--variants", action="store_true", help="Also check common variants of each username: other casings and '.', '_' and '-' swapped or dropped")
+    parser.add_argument("--variant-suffixes", type=int, default=0, help="With --variants, also try each name followed by 1 to N (default: 0)")
+    parser.add_argument("--deadline", type=parse_deadline, help="Seconds the whole scan may take; probes still running then are cancelled and reported as timed out")
+    parser.add_argument("--first-n", type=int, help="Stop checking a username once it has been found on this many sites")
+    parser.add_argument("--stop-on", help="Comma-separated site names; stop checking a username once it is found on any of them")
+    parser.add_argument("--serve", metavar="[HOST:]PORT", type=parse_address, help="Run as a local HTTP/JSON service instead of scanning once (binds 127.0.0.1 unless a host is given)")
+    parser.add_argument("--max-scans", type=int, default=4, help="Scans the service runs at once (default: 4)")
+    parser.add_argument("--max-queued", type=int, default=16, help="Scans the service queues before answering 503 (default: 16)")
+    parser.add_argument("--no-banner", action="store_true", help="Skip the ASCII art banner")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Machine mode: print only the URL of each found profile, one per line")
+    args = parser.parse_args()
+
+    if args.serve:
+        if args.username or args.usernames_file:
+            parser.error("--serve takes usernames from requests, not the command line")
+        if args.workers > 1:
+            parser.error("--serve runs one warm engine and cannot be combined with --workers")
+    elif not args.username and not args.usernames_file:
+        parser.error("a username or --usernames-file is required")
+    if args.username and args.usernames_file:
+        parser.error("give either a username or --usernames-file, not both")
+    if args.usernames_file and args.usernames_file != "-" and not os.path.isfile(args.usernames_file):
+        report(Fore.RED, f"[-] Error: Usernames file '{args.usernames_file}' not found.", args.quiet)
+        return
+
+    if args.engine == "async" and not has_aiohttp():
+        report(Fore.RED, "[-] Error: The async engine requires the 'aiohttp' package (pip install aiohttp).", args.quiet)
+        return
+
+    if args.file:
+        try:
+            sites = load_site_file(args.file)
+        except FileNotFoundError:
+            report(Fore.RED, f"[-] Error: Site list file '{args.file}' not found.", args.quiet)
+            return
+        except json.JSONDecodeError:
+            report(Fore.RED, f"[-] Error: Invalid JSON format in site list file '{args.file}'.", args.quiet)
+            return
+        except ValueError as e:
+            report(Fore.RED, f"[-] Error: Invalid site definition in '{args.file}': {e}", args.quiet)
+            return
+    else:
+        sites = load_default_sites()
+
+    stop_on = None
+    if args.stop_on:
+        stop_on = {name.strip().lower() for name in args.stop_on.split(",") if name.strip()}
+        unknown = stop_on - {site.name.lower() for site in sites}
+        if unknown:
+            report(Fore.RED, f"[-] Error: Unknown site for --stop-on: {', '.join(sorted(unknown))}", args.quiet)
+            return
+
+    cache = None
+    if args.cache:
+        import sqlite3
+        try:
+            cache = ResultCache(args.cache, args.cache_ttl, args.cache_negative_ttl)
+        except sqlite3.Error as e:
+            report(Fore.RED, f"[-] Error: Cannot open cache '{args.cache}': {e}", args.quiet)
+            return
+
+    if args.serve:
+        scanner = make_engine(
+            args.engine, threads=args.threads, timeout=args.timeout, max_retries=args.retry,
+            concurrency=args.concurrency, limit_per_host=args.limit_per_host, host_rate=args.host_rate, host_burst=args.host_burst,
+            retry_budget=args.retry_budget, retry_backoff=args.retry_backoff, max_body=args.max_body,
+        )
+        service = ScanService(scanner, sites, cache, args.max_scans, args.max_queued, args.deadline)
+        if not args.no_banner and not args.quiet:
+            print_banner()
+        try:
+            serve(args.serve, service, args.quiet)
+        finally:
+            service.close()
+            scanner.close()
+            if cache:
+                cache.close()
+        return
+
+    journal = None
+    if args.journal and args.resume and args.journal != args.resume:
+        parser.error("--journal and --resume must name the same file")
+    if args.journal or args.resume:
+        try:
+            journal = ScanJournal(args.resume or args.journal, resume=bool(args.resume))
+        except OSError as e:
+            report(Fore.RED, f"[-] Error: Cannot open journal '{args.resume or args.journal}': {e}", args.quiet)
+            if cache:
+                cache.close()
+            return
+        if journal.torn and not args.quiet:
+            print(Fore.YELLOW + f"[+] Skipped {journal.torn} incomplete journal lines" + Style.RESET_ALL)
+
+    usernames = read_usernames(args.usernames_file) if args.usernames_file else args.username
+    if args.variants:
+        usernames = expand_variants([usernames] if isinstance(usernames, str) else usernames, args.variant_suffixes)
+    try:
+        sherlock(
+            usernames, sites, threads=args.threads, timeout=args.timeout, output=args.output, max_retries=args.retry,
+            engine=args.engine, concurrency=args.concurrency, limit_per_host=args.limit_per_host, output_format=args.output_format,
+            host_rate=args.host_rate, host_burst=args.host_burst, retry_budget=args.retry_budget, retry_backoff=args.retry_backoff,
+            max_body=args.max_body, cache=cache, refresh=args.refresh, stats=args.stats, metrics_path=args.metrics,
+            workers=args.workers, journal=journal, banner=not args.no_banner, quiet=args.quiet, deadline=args.deadline,
+            first_n=args.first_n, stop_on=stop_on, fold_case=args.variants,
+        )
+    finally:
+        if cache:
+            cache.close()
+        if journal:
+            journal.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,110 @@
+import main
+
+
+def make_site(name="Site", url="https://example.com/{}", **definition):
+    return main.compile_site(dict(definition, name=name, url=url))
+
+
+def found(username, site):
+    profile = main.UserProfile(username, site.name, site.url.format(username))
+    return main.ProbeResult(username, site, profile)
+
+
+def test_username_variants_starts_with_the_username():
+    variants = list(main.username_variants("John.Doe"))
+    assert variants[0] == "John.Doe"
+    assert len(variants) == len(set(variants))
+    for expected in ("john.doe", "JOHN.DOE", "John_Doe", "john-doe", "JohnDoe", "johndoe"):
+        assert expected in variants
+
+
+def test_username_variants_suffixes():
+    variants = list(main.username_variants("bob", suffixes=2))
+    assert variants == ["bob", "Bob", "BOB", "bob1", "bob2"]
+
+
+def test_fetch_key_keeps_case_on_case_sensitive_sites():
+    site = make_site(url="https://news.example.com/user?id={}")
+    assert site.fetch_key("bob") != site.fetch_key("Bob")
+    assert site.fetch_key("bob", fold_case=True) != site.fetch_key("Bob", fold_case=True)
+
+
+def test_fetch_key_folds_case_only_when_asked():
+    site = make_site(case_insensitive=True)
+    assert site.fetch_key("bob") != site.fetch_key("Bob")
+    assert site.fetch_key("bob", fold_case=True) == site.fetch_key("Bob", fold_case=True)
+
+
+def test_fetch_key_matches_duplicate_catalogue_entries():
+    first = make_site("CreativeMarket", "https://creativemarket.com/{}")
+    second = make_site("Creative Market", "https://creativemarket.com/{}")
+    other = make_site("Other", "https://creativemarket.com/{}", detect={"method": "marker", "pattern": "profile"})
+    assert first.fetch_key("bob") == second.fetch_key("bob")
+    assert first.fetch_key("bob") != other.fetch_key("bob")
+
+
+def run(deduplicator, jobs):
+    """Runs jobs through dedupe() and a fake engine that finds every probed pair."""
+    probed = []
+
+    def engine(jobs):
+        for job in jobs:
+            if isinstance(job, main.ProbeResult):
+                yield job
+            else:
+                probed.append(job)
+                yield found(*job)
+
+    results = list(deduplicator.fan_out(engine(deduplicator.dedupe(jobs))))
+    return probed, results
+
+
+def test_dedupe_probes_case_variants_separately_on_case_sensitive_sites():
+    site = make_site(url="https://news.example.com/user?id={}")
+    probed, results = run(main.RequestDeduplicator(fold_case=True), [("bob", site), ("Bob", site)])
+    assert probed == [("bob", site), ("Bob", site)]
+    assert len(results) == 2
+
+
+def test_dedupe_shares_case_variants_on_case_insensitive_sites():
+    site = make_site(case_insensitive=True)
+    deduplicator = main.RequestDeduplicator(fold_case=True)
+    probed, results = run(deduplicator, [("bob", site), ("Bob", site)])
+    assert probed == [("bob", site)]
+    assert deduplicator.shared == 1
+    assert [(result.username, result.profile.url) for result in results] == [
+        ("bob", "https://example.com/bob"),
+        ("Bob", "https://example.com/Bob"),
+    ]
+
+
+def test_dedupe_keeps_spellings_apart_without_fold_case():
+    site = make_site(case_insensitive=True)
+    probed, _ = run(main.RequestDeduplicator(), [("bob", site), ("Bob", site)])
+    assert probed == [("bob", site), ("Bob", site)]
+
+
+def test_dedupe_shares_duplicate_catalogue_entries():
+    first = make_site("CreativeMarket", "https://creativemarket.com/{}")
+    second = make_site("Creative Market", "https://creativemarket.com/{}")
+    probed, results = run(main.RequestDeduplicator(), [("bob", first), ("bob", second)])
+    assert probed == [("bob", first)]
+    assert sorted(result.site.name for result in results) == ["Creative Market", "CreativeMarket"]
+    assert all(result.found for result in results)
+
+
+def test_dedupe_answers_repeats_of_a_finished_request():
+    site = make_site(case_insensitive=True)
+    deduplicator = main.RequestDeduplicator(fold_case=True)
+    run(deduplicator, [("bob", site)])
+    probed, results = run(deduplicator, [("BOB", site)])
+    assert probed == []
+    assert [result.username for result in results] == ["BOB"]
+
+
+def test_fan_out_passes_cached_results_through():
+    site = make_site()
+    cached = main.ProbeResult("bob", site, None, main.NOT_FOUND, cached=True)
+    probed, results = run(main.RequestDeduplicator(), [cached])
+    assert probed == []
+    assert results == [cached]